@@ -0,0 +1,204 @@
+import struct
+import sys
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import pygame
+from config import *
+from map_cache import load_scaled_map
+from memtrack import surface_bytes, track_surface
+from sprites import SpriteAtlas
+
+# 单个Surface资源在内存统计中的类别
+ASSET_CATEGORIES = {
+    'portal_img': 'sprites',
+    'exclamation_img': 'sprites',
+    'battle_bg': 'ui',
+    'attack_btn': 'ui',
+    'defend_btn': 'ui',
+    'flee_btn': 'ui',
+}
+
+
+def load_map(filename):
+    """读取按MAP_SCALE放大的地图（经过磁盘缓存）"""
+    return load_scaled_map(filename, MAP_SCALE)
+
+
+# JPEG中带有图片尺寸的帧头标记（SOF0~SOF15，除去DHT、JPG、DAC）
+JPEG_SOF_MARKERS = set(range(0xc0, 0xd0)) - {0xc4, 0xc8, 0xcc}
+
+
+def image_size(filename):
+    """从PNG或JPEG的文件头读出图片尺寸，不解码像素；其他格式退回到完整加载"""
+    with open(filename, 'rb') as f:
+        head = f.read(24)
+        if head[:8] == b'\x89PNG\r\n\x1a\n':
+            return struct.unpack('>II', head[16:24])
+        if head[:2] == b'\xff\xd8':
+            f.seek(2)
+            while True:
+                marker = f.read(4)
+                if len(marker) < 4 or marker[0] != 0xff:
+                    break
+                length = struct.unpack('>H', marker[2:])[0]
+                if marker[1] in JPEG_SOF_MARKERS:
+                    height, width = struct.unpack('>xHH', f.read(5))
+                    return width, height
+                f.seek(length - 2, 1)
+    return pygame.image.load(filename).get_size()
+
+
+_map_sizes = {}
+
+
+def map_sizes():
+    """各地图缩放后的尺寸，只读图片文件头，不需要显示窗口，无窗口模拟用"""
+    if not _map_sizes:
+        for name, filename in MAP_FILES.items():
+            width, height = image_size(filename)
+            _map_sizes[name] = (width * MAP_SCALE, height * MAP_SCALE)
+    return _map_sizes
+
+
+class MapCache(Mapping):
+    """按需加载地图，按内存上限做LRU淘汰，支持后台预加载"""
+
+    def __init__(self, files=MAP_FILES, budget=MAP_CACHE_BUDGET, loader=load_map):
+        self.files = files
+        self.budget = budget
+        self.loader = loader
+        self._surfaces = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, name):
+        if name not in self.files:
+            raise KeyError(name)
+
+        with self._lock:
+            if name in self._surfaces:
+                self._surfaces.move_to_end(name)
+                return self._surfaces[name]
+            thread = self._pending.get(name)
+
+        # 后台线程正在加载同一张地图，等它完成即可
+        if thread is not None:
+            thread.join()
+            with self._lock:
+                if name in self._surfaces:
+                    self._surfaces.move_to_end(name)
+                    return self._surfaces[name]
+
+        try:
+            surface = self.loader(self.files[name])
+        except pygame.error as e:
+            print(f"资源加载失败: {e}")
+            sys.exit()
+        self._store(name, surface)
+        return surface
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def is_loaded(self, name):
+        with self._lock:
+            return name in self._surfaces
+
+    def memory_usage(self):
+        """当前缓存的地图占用的字节数"""
+        with self._lock:
+            return sum(surface_bytes(s) for s in self._surfaces.values())
+
+    def _store(self, name, surface):
+        track_surface(surface, 'maps', name)
+        with self._lock:
+            self._surfaces[name] = surface
+            self._surfaces.move_to_end(name)
+            # 淘汰最久未使用的地图，刚放入的地图始终保留
+            total = sum(surface_bytes(s) for s in self._surfaces.values())
+            while total > self.budget and len(self._surfaces) > 1:
+                _, evicted = self._surfaces.popitem(last=False)
+                total -= surface_bytes(evicted)
+
+    def prefetch(self, name):
+        """在后台线程中预加载地图"""
+        with self._lock:
+            if name in self._surfaces or name in self._pending:
+                return
+            thread = threading.Thread(target=self._prefetch, args=(name,), daemon=True)
+            self._pending[name] = thread
+        thread.start()
+
+    def _prefetch(self, name):
+        try:
+            surface = self.loader(self.files[name])
+        except pygame.error:
+            # 预加载失败不处理，真正访问时会重新加载并报错
+            surface = None
+        if surface is not None:
+            self._store(name, surface)
+        with self._lock:
+            self._pending.pop(name, None)
+
+
+def load_battle_bg():
+    battle_bg = pygame.image.load("battle_bg.jpg").convert()
+    return pygame.transform.scale(battle_bg, (SCREEN_WIDTH, SCREEN_HEIGHT))
+
+
+def make_button(color):
+    """创建战斗按钮"""
+    button = pygame.Surface((150, 50))
+    button.fill(color)
+    return button
+
+
+class AssetManager(Mapping):
+    """
+    资源管理器，键与原来load_resources()返回的字典相同
+    资源在第一次访问时才加载，地图由MapCache按内存上限管理
+    """
+
+    def __init__(self, map_budget=MAP_CACHE_BUDGET):
+        self.maps = MapCache(budget=map_budget)
+        self.atlas = SpriteAtlas()
+        self._loaders = {
+            'maps': lambda: self.maps,
+            'animations': lambda: self.atlas.frames('player'),
+            'slime_animations': lambda: self.atlas.frames('slime'),
+            'battle_animations': lambda: self.atlas.frames('player', BATTLE_SPRITE_SCALE),
+            'battle_slime_animations': lambda: self.atlas.frames('slime', BATTLE_SPRITE_SCALE),
+            'portal_img': lambda: pygame.image.load("chuansongmen.png").convert_alpha(),
+            'exclamation_img': lambda: pygame.image.load("exclamation.png").convert_alpha(),
+            'battle_bg': load_battle_bg,
+            'attack_btn': lambda: make_button(RED),
+            'defend_btn': lambda: make_button(BLUE),
+            'flee_btn': lambda: make_button(GREEN),
+            'sprite_size': lambda: self.atlas.frame_size('player'),
+            'slime_size': lambda: self.atlas.frame_size('slime'),
+        }
+        self._cache = {}
+
+    def __getitem__(self, key):
+        if key not in self._cache:
+            loader = self._loaders[key]
+            try:
+                resource = loader()
+            except pygame.error as e:
+                print(f"资源加载失败: {e}")
+                sys.exit()
+            if key in ASSET_CATEGORIES:
+                track_surface(resource, ASSET_CATEGORIES[key], key)
+            self._cache[key] = resource
+        return self._cache[key]
+
+    def __iter__(self):
+        return iter(self._loaders)
+
+    def __len__(self):
+        return len(self._loaders)
\ No newline at end of file
@@ -0,0 +1,59 @@
+import random
+
+# 战斗结果
+ONGOING = 'ongoing'
+WON = 'won'
+LOST = 'lost'
+FLED = 'fled'
+
+# 战斗动作
+ATTACK = 'attack'
+DEFEND = 'defend'
+FLEE = 'flee'
+
+
+def player_damage(player, monster):
+    """玩家对怪物造成的伤害（Monster.take_damage保证至少为1）"""
+    return player.attack - monster.defense
+
+
+def monster_damage(player, monster, defending=False):
+    """怪物对玩家造成的伤害，防御时减半，至少为1"""
+    damage = max(1, monster.attack - player.defense)
+    if defending:
+        damage = max(1, damage // 2)
+    return damage
+
+
+def flee_chance(player, monster):
+    """逃跑成功率，速度越快越容易逃跑"""
+    return min(0.9, max(0.1, 0.5 + (player.speed - monster.speed) * 0.1))
+
+
+def resolve_turn(player, monster, action, rng=random):
+    """
+    结算一个战斗回合
+    :return: (战斗结果, 战斗消息, 是否升级)
+    """
+    if action == FLEE:
+        if rng.random() < flee_chance(player, monster):
+            return FLED, "成功逃跑了！", False
+        lines = ["逃跑失败！"]
+    elif action == ATTACK:
+        defeated, damage = monster.take_damage(player_damage(player, monster))
+        lines = [f"你对{monster.name}造成了{damage}点伤害"]
+        if defeated:
+            player.gold += monster.gold_reward
+            leveled_up = player.gain_exp(monster.exp_reward)
+            lines.append(f"击败了{monster.name}！获得{monster.exp_reward}经验，{monster.gold_reward}金币")
+            return WON, '\n'.join(lines), leveled_up
+    else:
+        lines = ["你摆出了防御姿态"]
+
+    damage = monster_damage(player, monster, defending=(action == DEFEND))
+    player.hp = max(0, player.hp - damage)
+    lines.append(f"{monster.name}对你造成了{damage}点伤害")
+    if player.hp <= 0:
+        lines.append("你被打倒了...")
+        return LOST, '\n'.join(lines), False
+    return ONGOING, '\n'.join(lines), False
\ No newline at end of file
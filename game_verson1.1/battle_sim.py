@@ -0,0 +1,252 @@
+import argparse
+import itertools
+import time
+
+import numpy as np
+from config import *
+from player import Player
+from monster import create_monster
+import battle
+
+# fight()返回的战斗结果编号
+ONGOING, WON, LOST, FLED = 0, 1, 2, 3
+
+# 每个战斗回合（玩家选择动作+动画）大约花费的秒数
+TURN_SECONDS = 1.5
+
+# 遇敌规则（与GameWorld一致）：移动30步之后每步2%概率遇敌
+SAFE_STEPS = 30
+ENCOUNTER_CHANCE = 0.02
+
+
+def player_stats(n, player=None):
+    """把Player的属性复制成长度为n的数组"""
+    player = player or Player()
+    return {name: np.full(n, getattr(player, name), dtype=np.int64)
+            for name in ('max_hp', 'hp', 'attack', 'defense', 'speed', 'exp', 'level', 'exp_to_level', 'gold')}
+
+
+def monster_stats(n, area_level):
+    """把create_monster(area_level)的属性复制成长度为n的数组"""
+    monster = create_monster(area_level)
+    return {name: np.full(n, getattr(monster, name), dtype=np.int64)
+            for name in ('max_hp', 'attack', 'defense', 'speed', 'exp_reward', 'gold_reward')}
+
+
+def default_growth():
+    """从Player.level_up读出每级成长值，调参时可以覆盖"""
+    before, after = Player(), Player()
+    after.level_up()
+    return {
+        'max_hp': after.max_hp - before.max_hp,
+        'attack': after.attack - before.attack,
+        'defense': after.defense - before.defense,
+        'exp_factor': after.exp_to_level / before.exp_to_level,
+    }
+
+
+def fight(player, monster, rng, policy=(1.0, 0.0, 0.0), max_turns=200):
+    """
+    向量化结算N场战斗，规则与battle.resolve_turn相同
+    :param player: player_stats()格式的数组字典，hp会被原地扣减
+    :param monster: monster_stats()格式的数组字典
+    :param policy: 每回合选择(攻击, 防御, 逃跑)的概率
+    :return: (战斗结果数组, 回合数数组)
+    """
+    n = len(player['hp'])
+    monster_hp = monster['max_hp'].copy()
+    outcome = np.zeros(n, dtype=np.int8)
+    turns = np.zeros(n, dtype=np.int64)
+
+    player_damage = np.maximum(1, player['attack'] - monster['defense'])
+    monster_damage = np.maximum(1, monster['attack'] - player['defense'])
+    defend_damage = np.maximum(1, monster_damage // 2)
+    flee_chance = np.clip(0.5 + (player['speed'] - monster['speed']) * 0.1, 0.1, 0.9)
+    attack_only = policy[0] >= 1.0
+
+    for _ in range(max_turns):
+        active = np.flatnonzero(outcome == ONGOING)
+        if active.size == 0:
+            break
+        turns[active] += 1
+
+        if attack_only:
+            action = np.zeros(active.size, dtype=np.int8)
+        else:
+            action = rng.choice(3, size=active.size, p=policy).astype(np.int8)
+
+        # 逃跑
+        fled = active[(action == 2) & (rng.random(active.size) < flee_chance[active])]
+        outcome[fled] = FLED
+
+        # 攻击
+        attackers = active[action == 0]
+        monster_hp[attackers] -= player_damage[attackers]
+        won = attackers[monster_hp[attackers] <= 0]
+        outcome[won] = WON
+
+        # 没结束的战斗由怪物反击
+        hit = active[outcome[active] == ONGOING]
+        defending = action[outcome[active] == ONGOING] == 1
+        player['hp'][hit] -= np.where(defending, defend_damage[hit], monster_damage[hit])
+        player['hp'][hit] = np.maximum(player['hp'][hit], 0)
+        outcome[hit[player['hp'][hit] <= 0]] = LOST
+
+    return outcome, turns
+
+
+def gain_rewards(player, monster, won, growth):
+    """胜利后获得金币和经验，规则与Player.gain_exp相同（一次最多升一级）"""
+    player['gold'][won] += monster['gold_reward'][won]
+    player['exp'][won] += monster['exp_reward'][won]
+    up = won[player['exp'][won] >= player['exp_to_level'][won]]
+    player['exp'][up] -= player['exp_to_level'][up]
+    player['level'][up] += 1
+    player['max_hp'][up] += growth['max_hp']
+    player['hp'][up] = player['max_hp'][up]
+    player['attack'][up] += growth['attack']
+    player['defense'][up] += growth['defense']
+    player['exp_to_level'][up] = (player['exp_to_level'][up] * growth['exp_factor']).astype(np.int64)
+
+
+def progression(n, area_level, hours=1.0, growth=None, policy=(1.0, 0.0, 0.0), seed=0):
+    """
+    模拟n个玩家在同一区域连续刷怪hours小时（不回血，升级时回满）
+    :return: 统计结果字典，level_curve为每分钟的平均等级
+    """
+    rng = np.random.default_rng(seed)
+    growth = growth or default_growth()
+    player = player_stats(n)
+    monster = monster_stats(n, area_level)
+    start_gold = player['gold'].copy()
+    total_exp = np.zeros(n, dtype=np.int64)
+
+    clock = np.zeros(n)
+    alive = np.ones(n, dtype=bool)
+    limit = hours * 3600
+    minutes = int(limit // 60)
+    level_curve = np.zeros(minutes + 1)
+    checkpoint = 0
+    fights = wins = 0
+    turn_total = 0
+
+    while True:
+        running = np.flatnonzero(alive & (clock < limit))
+        if running.size == 0:
+            break
+
+        # 走到下一次遇敌
+        steps = SAFE_STEPS + rng.geometric(ENCOUNTER_CHANCE, size=running.size)
+        clock[running] += steps / TICK_RATE
+
+        sub_player = {name: values[running] for name, values in player.items()}
+        sub_monster = {name: values[running] for name, values in monster.items()}
+        outcome, turns = fight(sub_player, sub_monster, rng, policy)
+        clock[running] += turns * TURN_SECONDS
+
+        won = np.flatnonzero(outcome == WON)
+        gain_rewards(sub_player, sub_monster, won, growth)
+        total_exp[running[won]] += sub_monster['exp_reward'][won]
+        for name, values in sub_player.items():
+            player[name][running] = values
+        alive[running[outcome == LOST]] = False
+
+        fights += running.size
+        wins += won.size
+        turn_total += int(turns.sum())
+
+        # 所有活着的玩家都走过这一分钟后，记录平均等级
+        frontier = np.where(alive, clock, np.inf).min()
+        while checkpoint <= minutes and frontier >= checkpoint * 60:
+            level_curve[checkpoint] = player['level'].mean()
+            checkpoint += 1
+
+    level_curve[checkpoint:] = player['level'].mean()
+    elapsed_hours = np.minimum(clock, limit) / 3600
+    return {
+        'area_level': area_level,
+        'players': n,
+        'win_rate': wins / max(1, fights),
+        'turns_per_fight': turn_total / max(1, fights),
+        'exp_per_hour': float((total_exp / elapsed_hours).mean()),
+        'gold_per_hour': float(((player['gold'] - start_gold) / elapsed_hours).mean()),
+        'death_rate': float((~alive).mean()),
+        'final_level': float(player['level'].mean()),
+        'level_curve': level_curve,
+    }
+
+
+def sweep(attack_values, defense_values, area_level, fights_per_cell=10000, seed=0):
+    """
+    对玩家攻击力和防御力的每个组合各打fights_per_cell场满血战斗，所有组合放在一个批次里结算
+    :return: {(攻击, 防御): (胜率, 平均回合数)}
+    """
+    rng = np.random.default_rng(seed)
+    grid = list(itertools.product(attack_values, defense_values))
+    n = len(grid) * fights_per_cell
+    player = player_stats(n)
+    player['attack'] = np.repeat([a for a, _ in grid], fights_per_cell).astype(np.int64)
+    player['defense'] = np.repeat([d for _, d in grid], fights_per_cell).astype(np.int64)
+    outcome, turns = fight(player, monster_stats(n, area_level), rng)
+
+    win_rate = (outcome == WON).reshape(len(grid), fights_per_cell).mean(axis=1)
+    mean_turns = turns.reshape(len(grid), fights_per_cell).mean(axis=1)
+    return {cell: (win_rate[i], mean_turns[i]) for i, cell in enumerate(grid)}
+
+
+def check_against_engine(samples=500, seed=0):
+    """用battle.resolve_turn逐场结算同样的战斗，确认向量化版本的结果一致"""
+    rng = np.random.default_rng(seed)
+    player = player_stats(samples)
+    player['attack'] = rng.integers(5, 40, samples)
+    player['defense'] = rng.integers(0, 30, samples)
+    player['max_hp'] = rng.integers(20, 200, samples)
+    player['hp'] = player['max_hp'].copy()
+    monster = monster_stats(samples, 3)
+    outcome, turns = fight(player, monster, rng)
+
+    names = {battle.WON: WON, battle.LOST: LOST}
+    for i in range(samples):
+        p = Player()
+        p.attack, p.defense = int(player['attack'][i]), int(player['defense'][i])
+        p.hp = p.max_hp = int(player['max_hp'][i])
+        m = create_monster(3)
+        result, count = battle.ONGOING, 0
+        while result == battle.ONGOING:
+            result, _, _ = battle.resolve_turn(p, m, battle.ATTACK)
+            count += 1
+        if names[result] != outcome[i] or count != turns[i]:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量模拟玩家与怪物的战斗，用于数值平衡")
+    parser.add_argument('--players', type=int, default=10000, help="每个区域模拟的玩家数")
+    parser.add_argument('--hours', type=float, default=1.0)
+    parser.add_argument('--fights', type=int, default=10000, help="参数扫描中每个组合的战斗场数")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print("与battle.resolve_turn一致:", check_against_engine(seed=args.seed))
+
+    for area_level in (1, 2, 3):
+        start = time.perf_counter()
+        stats = progression(args.players, area_level, args.hours, seed=args.seed)
+        elapsed = time.perf_counter() - start
+        curve = ' '.join(f"{level:.1f}" for level in stats['level_curve'][::10])
+        print(f"区域{area_level}: 胜率 {stats['win_rate']:.1%}, 平均回合 {stats['turns_per_fight']:.1f}, "
+              f"经验/小时 {stats['exp_per_hour']:.0f}, 金币/小时 {stats['gold_per_hour']:.0f}, "
+              f"死亡率 {stats['death_rate']:.1%}, 最终等级 {stats['final_level']:.1f} ({elapsed:.2f}s)")
+        print(f"  每10分钟平均等级: {curve}")
+
+    start = time.perf_counter()
+    attack_values = range(10, 31, 2)
+    defense_values = range(5, 21, 2)
+    result = sweep(attack_values, defense_values, 3, args.fights, seed=args.seed)
+    elapsed = time.perf_counter() - start
+    total = len(result) * args.fights
+    print(f"史莱姆王胜率（攻击 x 防御，{total}场战斗，{elapsed:.2f}s）")
+    print("攻击\\防御 " + ''.join(f"{d:>6}" for d in defense_values))
+    for a in attack_values:
+        print(f"{a:>9} " + ''.join(f"{result[(a, d)][0]:>6.0%}" for d in defense_values))
\ No newline at end of file
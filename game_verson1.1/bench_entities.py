@@ -0,0 +1,111 @@
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+
+from player import Player
+from monster import Monster, MonsterPool, species_for
+from npc import SlimeNPC
+import battle
+
+
+class DictEntity:
+    """原来基于__dict__的实体，属性与现在的类相同，用作对比基准"""
+
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class DictMonster(DictEntity):
+    take_damage = Monster.take_damage
+
+
+def dict_player():
+    return DictEntity(max_hp=100, hp=100, attack=15, defense=10, speed=5, exp=0, level=1,
+                      exp_to_level=100, gold=50)
+
+
+def dict_monster(area_level):
+    species = species_for(area_level)
+    return DictMonster(**species._asdict(), hp=species.max_hp)
+
+
+def dict_slime(x, y):
+    return DictEntity(x=x, y=y, speed=1.5, direction='down', frame_index=0, animation_counter=0,
+                      move_counter=0, move_duration=60, wait_duration=30, state='moving')
+
+
+def bytes_per_entity(factory, count):
+    """创建count个实体，返回平均每个占用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # 扣掉列表本身
+    return (after - before - entities.__sizeof__()) / count
+
+
+def run_battles(acquire, release, battles, seed=0):
+    """
+    用battle.resolve_turn打battles场战斗（一直攻击，失败后玩家回满血）
+    :return: (每场战斗耗时（微秒）, 创建的怪物对象数)
+    """
+    rng = random.Random(seed)
+    player = Player()
+    created = 0
+    start = time.perf_counter()
+    for i in range(battles):
+        monster, new = acquire(i % 3 + 1)
+        created += new
+        outcome = battle.ONGOING
+        while outcome == battle.ONGOING:
+            outcome, _, _ = battle.resolve_turn(player, monster, battle.ATTACK, rng)
+        if outcome == battle.LOST:
+            player.hp = player.max_hp
+        release(monster)
+    return (time.perf_counter() - start) / battles * 1e6, created
+
+
+def stat_reads(monster, reads):
+    """战斗公式每回合读取的怪物属性，返回每次读取四个属性的耗时（纳秒）"""
+    start = time.perf_counter()
+    for _ in range(reads):
+        monster.attack, monster.defense, monster.speed, monster.max_hp
+    return (time.perf_counter() - start) / reads * 1e9
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="实体对象的内存占用和每场战斗的对象分配对比")
+    parser.add_argument('--count', type=int, default=100000, help="测量内存时创建的实体数")
+    parser.add_argument('--battles', type=int, default=100000)
+    parser.add_argument('--reads', type=int, default=1000000, help="测量属性读取时的读取次数")
+    args = parser.parse_args()
+
+    print(f"{'实体':<10} {'dict(字节)':>12} {'__slots__(字节)':>16} {'节省':>8}")
+    rows = [
+        ('Player', lambda i: dict_player(), lambda i: Player()),
+        ('Monster', lambda i: dict_monster(i % 3 + 1), lambda i: Monster(species_for(i % 3 + 1))),
+        ('SlimeNPC', lambda i: dict_slime(i, i), lambda i: SlimeNPC(i, i)),
+    ]
+    for name, old, new in rows:
+        old_bytes = bytes_per_entity(old, args.count)
+        new_bytes = bytes_per_entity(new, args.count)
+        print(f"{name:<10} {old_bytes:>12.0f} {new_bytes:>16.0f} {1 - new_bytes / old_bytes:>8.0%}")
+
+    # 属性读取：dict实例 vs Monster（热属性存在槽里，其余从种类模板读取）
+    dict_ns = stat_reads(dict_monster(2), args.reads)
+    slot_ns = stat_reads(Monster(species_for(2)), args.reads)
+    print(f"读取攻击/防御/速度/最大HP: dict {dict_ns:.1f} ns, Monster {slot_ns:.1f} ns")
+
+    # 每场战斗新建怪物 vs 从池里复用
+    fresh_us, fresh_created = run_battles(lambda level: (dict_monster(level), 1), lambda monster: None,
+                                          args.battles)
+    pool = MonsterPool()
+    pooled_us, _ = run_battles(lambda level: (pool.acquire(level), 0), pool.release, args.battles)
+    print(f"每场新建dict怪物: {fresh_us:.2f} us/场, 共创建 {fresh_created} 个怪物 "
+          f"({fresh_created / args.battles:.2f} 个/场)")
+    print(f"怪物池复用:       {pooled_us:.2f} us/场, 共创建 {pool.created} 个怪物 "
+          f"({pool.created / args.battles:.5f} 个/场)")
\ No newline at end of file
@@ -0,0 +1,49 @@
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+from config import *
+
+
+def run_once(cold):
+    """
+    启动一次游戏直到画出第一帧
+    :param cold: 是否先删除磁盘缓存（地图、通行网格、字体路径）
+    :return: (进程总耗时, {阶段: 耗时})，单位毫秒
+    """
+    if cold:
+        shutil.rmtree(os.path.dirname(MAP_CACHE_DIR), ignore_errors=True)
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', SDL_AUDIODRIVER='dummy')
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, 'main.py', '--startup-report', '--new-game'], env=env,
+                            capture_output=True, text=True, check=True).stdout
+    wall = (time.perf_counter() - start) * 1000
+
+    phases = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) >= 3 and parts[2] == 'ms':
+            phases[parts[0]] = float(parts[1])
+    # 进程总耗时减去进程内测到的部分，就是解释器启动和退出的时间
+    phases['interpreter'] = wall - phases.get('total', 0.0)
+    return wall, phases
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="冷/热启动到第一帧的耗时分解")
+    parser.add_argument('--runs', type=int, default=5)
+    args = parser.parse_args()
+
+    for mode in ('cold', 'warm'):
+        if mode == 'warm':
+            run_once(cold=False)
+        results = [run_once(cold=mode == 'cold') for _ in range(args.runs)]
+        walls = [wall for wall, _ in results]
+        print(f"{mode}: 进程启动到第一帧 {statistics.median(walls):.1f} ms（{args.runs}次中位数）")
+        for name in results[0][1]:
+            values = [phases[name] for _, phases in results]
+            print(f"  {name:<16}{statistics.median(values):9.1f} ms")
\ No newline at end of file
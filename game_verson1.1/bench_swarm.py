@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from npc import SlimeNPC
+from swarm import SlimeSwarm
+
+
+def time_per_tick(update, ticks):
+    """返回每个tick的平均耗时（毫秒）"""
+    update()
+    start = time.perf_counter()
+    for _ in range(ticks):
+        update()
+    return (time.perf_counter() - start) / ticks * 1000
+
+
+def bench(count, ticks):
+    slimes = [SlimeNPC(i % 1000, i // 1000) for i in range(count)]
+
+    def update_objects():
+        for slime in slimes:
+            slime.update()
+
+    swarm = SlimeSwarm.from_positions([(i % 1000, i // 1000) for i in range(count)], seed=0)
+    return time_per_tick(update_objects, ticks), time_per_tick(swarm.update, ticks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SlimeNPC对象列表与SlimeSwarm的每tick耗时对比")
+    parser.add_argument('--counts', type=int, nargs='+', default=[10, 1000, 100000])
+    args = parser.parse_args()
+
+    print(f"{'数量':>8} {'SlimeNPC(ms)':>14} {'SlimeSwarm(ms)':>16} {'加速比':>8}")
+    for count in args.counts:
+        # 数量越大跑的tick越少，保证每组都在几秒内完成
+        ticks = max(10, 200000 // count)
+        objects_ms, swarm_ms = bench(count, ticks)
+        print(f"{count:>8} {objects_ms:>14.4f} {swarm_ms:>16.4f} {objects_ms / swarm_ms:>8.1f}x")
\ No newline at end of file
@@ -0,0 +1,257 @@
+import os
+
+# 使用SDL的虚拟显示驱动，不需要真实窗口
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import argparse
+import atexit
+import json
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import pygame
+from config import *
+
+BENCHMARKS = []
+
+
+def benchmark(name, params=(None,)):
+    """注册一个基准测试，函数接收参数并返回被计时的无参函数"""
+    def register(setup):
+        BENCHMARKS.append((name, params, setup))
+        return setup
+    return register
+
+
+def measure(fn, min_time=0.2, rounds=5):
+    """多轮计时，返回每次调用耗时的中位数（毫秒）"""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed * rounds >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+
+    samples = [elapsed / number]
+    for _ in range(rounds - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return statistics.median(samples) * 1000
+
+
+@benchmark('load_resources', params=('cold', 'warm'))
+def bench_load_resources(mode):
+    import map_cache
+    from assets import AssetManager
+
+    cache_dir = tempfile.mkdtemp(prefix='map_cache_')
+    atexit.register(shutil.rmtree, cache_dir, True)
+    map_cache.MAP_CACHE_DIR = cache_dir
+    if mode == 'warm':
+        map_cache.load_scaled_map(MAP_FILES['village'])
+
+    def run():
+        if mode == 'cold':
+            for entry in os.listdir(cache_dir):
+                os.remove(os.path.join(cache_dir, entry))
+        resources = AssetManager()
+        for key in resources:
+            resources[key]
+        resources['maps']['village']
+    return run
+
+
+@benchmark('map_blit', params=(2, 4, 6))
+def bench_map_blit(scale):
+    from map_renderer import TiledMap
+
+    screen = pygame.display.get_surface()
+    original = pygame.image.load(MAP_FILES['hubei']).convert()
+    surface = pygame.transform.scale(original, (original.get_width() * scale, original.get_height() * scale))
+    map_view = TiledMap(surface)
+    max_x = map_view.width - SCREEN_WIDTH
+    state = {'x': 0}
+
+    def run():
+        # 每次都移动相机，测的是整屏重画
+        state['x'] = (state['x'] + 7) % max_x
+        map_view.draw(screen, -state['x'], -100)
+    return run
+
+
+@benchmark('map_blit_cached', params=('converted', 'cached'))
+def bench_map_blit_cached(source):
+    # 游戏里的地图来自磁盘缓存，与直接convert()的Surface比较整屏blit
+    import map_cache
+    from map_renderer import TiledMap
+
+    screen = pygame.display.get_surface()
+    if source == 'cached':
+        cache_dir = tempfile.mkdtemp(prefix='map_cache_')
+        atexit.register(shutil.rmtree, cache_dir, True)
+        map_cache.MAP_CACHE_DIR = cache_dir
+        map_cache.load_scaled_map(MAP_FILES['village'])
+        surface = map_cache.load_scaled_map(MAP_FILES['village'])
+    else:
+        original = pygame.image.load(MAP_FILES['village']).convert()
+        surface = pygame.transform.scale(original, (original.get_width() * MAP_SCALE,
+                                                    original.get_height() * MAP_SCALE))
+    map_view = TiledMap(surface)
+    max_x = map_view.width - SCREEN_WIDTH
+    state = {'x': 0}
+
+    def run():
+        state['x'] = (state['x'] + 7) % max_x
+        map_view.draw(screen, -state['x'], -100)
+    return run
+
+
+@benchmark('draw_hud', params=('static', 'changing'))
+def bench_draw_hud(mode):
+    from ui import draw_hud
+    from player import Player
+
+    screen = pygame.display.get_surface()
+    player = Player()
+
+    def run():
+        if mode == 'changing':
+            player.gold += 1
+        draw_hud(screen, player, 'village')
+    return run
+
+
+@benchmark('draw_battle_screen', params=(1, 3, 6))
+def bench_draw_battle_screen(lines):
+    from ui import draw_battle_screen
+    from assets import AssetManager
+    from player import Player
+    from monster import create_monster
+
+    screen = pygame.display.get_surface()
+    resources = AssetManager()
+    player, monster = Player(), create_monster(2)
+    message = '\n'.join(f"第{i + 1}行战斗消息，你对大史莱姆造成了{i + 5}点伤害" for i in range(lines))
+
+    def run():
+        draw_battle_screen(
+            screen, player, monster, resources['battle_bg'],
+            resources['attack_btn'], resources['defend_btn'], resources['flee_btn'],
+            resources['battle_animations'], 'down', 0,
+            resources['battle_slime_animations'], 0, False, message
+        )
+    return run
+
+
+@benchmark('draw_dialog', params=(10, 40))
+def bench_draw_dialog(length):
+    from ui import draw_dialog
+
+    screen = pygame.display.get_surface()
+    npc_image = pygame.Surface((32, 48))
+    lines = ["治" * length, "安" * length]
+    state = {'i': 0}
+
+    def run():
+        state['i'] ^= 1
+        draw_dialog(screen, lines, state['i'], 0, 0, npc_image, (100, 100))
+    return run
+
+
+@benchmark('draw_overlays')
+def bench_draw_overlays(_):
+    from ui import draw_level_up_screen, draw_game_over_screen
+    from player import Player
+
+    screen = pygame.display.get_surface()
+    player = Player()
+
+    def run():
+        draw_level_up_screen(screen, player)
+        draw_game_over_screen(screen)
+    return run
+
+
+@benchmark('slime_npc_update', params=(10, 1000, 10000))
+def bench_slime_npc_update(count):
+    from npc import SlimeNPC
+
+    slimes = [SlimeNPC(i, i) for i in range(count)]
+
+    def run():
+        for slime in slimes:
+            slime.update()
+    return run
+
+
+@benchmark('slime_swarm_update', params=(10, 1000, 10000))
+def bench_slime_swarm_update(count):
+    from swarm import SlimeSwarm
+
+    return SlimeSwarm.from_positions([(i, i) for i in range(count)], seed=0).update
+
+
+@benchmark('create_monster', params=(1, 2, 3))
+def bench_create_monster(area_level):
+    from monster import create_monster
+
+    return lambda: create_monster(area_level)
+
+
+def run_benchmarks(pattern=None):
+    results = {}
+    for name, params, setup in BENCHMARKS:
+        for param in params:
+            key = name if param is None else f"{name}[{param}]"
+            if pattern and pattern not in key:
+                continue
+            results[key] = measure(setup(param))
+            print(f"{key:<32}{results[key]:>10.4f} ms", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """返回比基线慢超过threshold（比例）的条目"""
+    regressions = []
+    for key, value in results.items():
+        base = baseline.get(key)
+        if base and value > base * (1 + threshold):
+            regressions.append((key, base, value))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="无窗口的渲染和更新热点基准测试")
+    parser.add_argument('-k', dest='pattern', help="只运行名字包含该字符串的测试")
+    parser.add_argument('--output', metavar='FILE', help="把结果写入JSON文件")
+    parser.add_argument('--baseline', metavar='FILE', help="与基线JSON比较，超过阈值时返回非0")
+    parser.add_argument('--threshold', type=float, default=0.25, help="允许比基线慢的比例（默认0.25）")
+    args = parser.parse_args()
+
+    pygame.init()
+    pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    results = run_benchmarks(args.pattern)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'results': results, 'unit': 'ms'}, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for key, base, value in regressions:
+            print(f"性能退化: {key} {base:.4f} ms -> {value:.4f} ms (+{value / base - 1:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"与基线相比没有超过{args.threshold:.0%}的退化")
\ No newline at end of file
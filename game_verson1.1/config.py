@@ -15,11 +15,112 @@ YELLOW = (255, 255, 0)
 GRAY = (100, 100, 100)
 BROWN = (139, 69, 19)
 
-# 帧率
-FPS = 60
+# 渲染帧率上限（0为不限制），与逻辑tick无关
+FPS = 120
+# 逻辑更新频率（每秒tick数），所有计数器都按tick计
+TICK_RATE = 60
+# 跟不上时最多连续跳过的渲染帧数
+MAX_RENDER_SKIP = 5
+# 一帧最多追赶的逻辑时间（秒），超过时视为程序被挂起，不再追赶
+MAX_CATCHUP_SECONDS = 1.0
 
 # 地图缩放
 MAP_SCALE = 4
+# 地图图块大小（像素，缩放后）
+TILE_SIZE = 256
+
+# 地图文件
+MAP_FILES = {
+    'village': 'liyangcun.jpg',
+    'hubei': 'liyanghubei.jpg',
+    'hunan': 'liyanghunan.jpg',
+    'dongxuan': 'dongxuancheng.jpg',
+    'liyangdao': 'liyangdao.jpg',
+}
+# 已缩放地图在内存中最多占用的字节数（超出后按LRU淘汰）
+MAP_CACHE_BUDGET = 40 * 1024 * 1024
+# 已缩放地图的磁盘缓存目录
+MAP_CACHE_DIR = '.cache/maps'
+
+# 传送门位置（缩放后的地图坐标）和目标地图
+PORTALS = {
+    'village': [((1560, 678), 'hubei')],
+    'hubei': [((40, 802), 'village'), ((2360, 802), 'hunan')],
+    'hunan': [((40, 714), 'hubei')],
+}
+# 玩家离传送门多近时开始后台预加载目标地图
+PREFETCH_RADIUS = 300
+
+# 界面字体和字体路径缓存文件
+UI_FONT = 'simhei'
+FONT_CACHE_FILE = '.cache/fonts.json'
+
+# 文字渲染缓存最多保存的条目数
+TEXT_CACHE_SIZE = 256
+
+# 治安官位置和触发对话的距离
+OFFICER_POS = (190, 803)
+OFFICER_RADIUS = 50
+
+# 空间哈希的格子大小（像素，缩放后的地图坐标）
+SPATIAL_CELL_SIZE = 128
+
+# PointGrid查询时，实体数不超过(要查的格子数 × 该值)就直接检查全部实体
+POINT_GRID_SCAN = 64
+
+# 各地图上巡逻的史莱姆出生点
+SLIME_SPAWNS = {
+    'hubei': [(1200, 800)],
+}
+
+# 通行网格的格子大小（像素，缩放后的地图坐标，需为MAP_SCALE的整数倍）
+NAV_CELL_SIZE = 16
+# 通行网格的磁盘缓存目录
+NAV_CACHE_DIR = '.cache/nav'
+# 传送门和治安官周围保证可通行的半径
+NAV_CLEARANCE = 128
+# 史莱姆在多少格以内会沿流场追向玩家
+SLIME_CHASE_CELLS = 12
+
+# 训练环境每步推进的tick数和每局最多步数
+ENV_FRAME_SKIP = 4
+ENV_MAX_STEPS = 5000
+# 像素观测的默认分辨率（宽, 高）
+OBS_PIXEL_SIZE = (84, 84)
+
+# 精灵图布局文件
+ATLAS_FILE = 'atlas.json'
+# 战斗界面中精灵的放大倍数
+BATTLE_SPRITE_SCALE = 2
+# Animation默认每帧持续的毫秒数（约等于60帧下每10帧换一帧）
+ANIMATION_FRAME_MS = 167
+
+# 性能分析器保留最近多少帧的耗时
+PROFILER_FRAMES = 600
+
+# 存档文件和自动存档间隔（tick）
+SAVE_FILE = 'save.dat'
+AUTOSAVE_TICKS = 10 * TICK_RATE
+
+# 内存统计：检测每帧分配时观察最近多少帧，超过多少比例的帧都在分配时报告
+MEMTRACK_WINDOW = 120
+MEMTRACK_CHURN_RATIO = 0.5
+# 各类Surface的尺寸上限（像素），超过时在内存报告中标出；地图不限制
+ASSET_SIZE_LIMITS = {
+    'sprites': (512, 512),
+    'ui': (SCREEN_WIDTH, SCREEN_HEIGHT),
+    'text': (SCREEN_WIDTH, 128),
+}
+
+# 多人服务器的端口、每隔多少tick发送一次快照、同步时坐标的量化倍数
+SERVER_PORT = 7777
+SNAPSHOT_INTERVAL = 3
+POSITION_SCALE = 2
+# 兴趣范围：屏幕四周再向外扩展的距离，只同步范围内的实体
+INTEREST_MARGIN = 256
+# 每个客户端保留最近多少个快照作为增量的基准；多少tick没有输入时断开
+SNAPSHOT_HISTORY = 32
+CLIENT_TIMEOUT = 10 * TICK_RATE
 
 # 其他常量
 PORTAL_RADIUS = 20
\ No newline at end of file
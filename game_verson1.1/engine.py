@@ -0,0 +1,397 @@
+import argparse
+import random
+import time
+
+import pygame
+from config import *
+from player import Player
+from monster import monster_pool
+from swarm import SlimeSwarm
+from spatial import SpatialHash, PointGrid
+from navigation import FlowField
+from profiler import profiler
+from game_state import GameState
+from battle import resolve_turn, ONGOING, WON, LOST, ATTACK, DEFEND, FLEE
+from savegame import restore
+
+# 角色每个方向的动画帧数
+PLAYER_FRAME_COUNT = 3
+
+# 战斗中的按键和按钮
+BATTLE_KEYS = {pygame.K_1: ATTACK, pygame.K_2: DEFEND, pygame.K_3: FLEE}
+BATTLE_BUTTONS = [
+    (pygame.Rect(50, SCREEN_HEIGHT - 150, 150, 50), ATTACK),
+    (pygame.Rect(SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 150, 150, 50), DEFEND),
+    (pygame.Rect(SCREEN_WIDTH - 200, SCREEN_HEIGHT - 150, 150, 50), FLEE),
+]
+
+# 怪物攻击动画持续的tick数
+MONSTER_ATTACK_TICKS = 20
+
+# 空间索引中的治安官
+OFFICER = ('officer', None)
+
+DIALOG_LINES = [
+    "治安官：最近村里不太平...",
+    "治安官：有村民报告看到可疑人物",
+    "治安官：如果你发现什么可疑情况，请立即告诉我"
+]
+
+
+class KeyState:
+    """按键状态，可以像pygame.key.get_pressed()的结果一样用按键常量索引"""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+class GameWorld:
+    """
+    游戏逻辑状态，不依赖窗口和渲染
+    每次update推进一个固定时长（1 / TICK_RATE 秒）的tick
+    """
+
+    def __init__(self, map_sizes, map_type='village', walk_grid=None, rng=None, shared_slimes=None):
+        """
+        :param map_sizes: 各地图缩放后的尺寸
+        :param walk_grid: 按地图名返回navigation.WalkGrid的函数，为None时没有碰撞和寻路
+        :param rng: 遇敌、战斗和史莱姆种子使用的random.Random，默认共用random模块
+        :param shared_slimes: 按地图名返回SlimeSwarm的函数；给出时史莱姆由调用方（如多人服务器）统一更新
+        """
+        self.map_sizes = map_sizes
+        self.walk_grid = walk_grid
+        self.shared_slimes = shared_slimes
+        self.rng = rng or random
+        self.start_map = map_type
+        self.tick = 0
+        self.running = True
+        # 最近一次存档的快照（savegame.snapshot的结果），快速重开时恢复到这里
+        self.checkpoint = None
+        self.current_monster = None
+        self.reset()
+
+    def reset(self):
+        """重置玩家和游戏状态"""
+        self.player = Player()
+        self.game_state = GameState.EXPLORING
+        self.current_direction = 'down'
+        self.current_frame = 0
+        self.animation_counter = 0
+        self.steps_since_last_battle = 0
+
+        # 战斗相关（战斗中重置时把怪物还给对象池）
+        if self.current_monster is not None:
+            monster_pool.release(self.current_monster)
+        self.current_monster = None
+        self.battle_message = ""
+        self.battle_outcome = ONGOING
+        self.leveled_up = False
+        self.monster_attack_timer = 0
+
+        # NPC和对话
+        self.officer_pos = OFFICER_POS
+        self.show_exclamation = False
+        self.current_dialog = 0
+        self.dialog_lines = DIALOG_LINES
+
+        self.enter_map(self.start_map)
+
+    def restart(self):
+        """快速重开：有存档快照时回到最近一次存档，否则从头开始"""
+        if self.checkpoint is None:
+            self.reset()
+        else:
+            restore(self, self.checkpoint)
+
+    @property
+    def is_monster_attacking(self):
+        return self.monster_attack_timer > 0
+
+    def enter_map(self, map_type, pos=None):
+        """切换地图，pos为None时玩家出现在地图中央"""
+        self.map_type = map_type
+        self.map_width, self.map_height = self.map_sizes[map_type]
+        self.player_x, self.player_y = pos or (self.map_width // 2, self.map_height // 2)
+        self.walk = self.walk_grid(map_type) if self.walk_grid else None
+        if self.shared_slimes is not None:
+            self.slimes = self.shared_slimes(map_type)
+            self.slime_flow = None
+        else:
+            self.slimes = SlimeSwarm.from_positions(SLIME_SPAWNS.get(map_type, []), seed=self.rng.getrandbits(64))
+            # 所有史莱姆共用一个追向玩家的流场
+            self.slime_flow = FlowField(self.walk, SLIME_CHASE_CELLS) if self.walk and len(self.slimes) else None
+        self.build_spatial_index()
+        self.update_camera()
+
+    def build_spatial_index(self):
+        """登记当前地图上的治安官和传送门；史莱姆用PointGrid批量索引（共享的史莱姆由调用方索引）"""
+        self.spatial = SpatialHash()
+        self.slime_index = PointGrid()
+        if self.map_type == "village":
+            self.spatial.insert(OFFICER, self.officer_pos[0], self.officer_pos[1], OFFICER_RADIUS)
+        for (x, y), target in PORTALS.get(self.map_type, []):
+            self.spatial.insert(('portal', target), x, y, PORTAL_RADIUS)
+        if self.shared_slimes is None:
+            n = len(self.slimes)
+            self.slime_index.update(self.slimes.x[:n], self.slimes.y[:n])
+
+    def update_slimes(self):
+        if self.slime_flow is not None:
+            self.slime_flow.update([(self.player_x, self.player_y)])
+        self.slimes.update(self.walk, self.slime_flow)
+        n = len(self.slimes)
+        self.slime_index.update(self.slimes.x[:n], self.slimes.y[:n])
+
+    def nearby_portals(self, radius):
+        """返回离玩家radius以内的传送门通往的地图"""
+        return [entity[1] for entity in self.spatial.query_radius(self.player_x, self.player_y, radius)
+                if entity[0] == 'portal']
+
+    def arrival_point(self, target, origin):
+        """从origin地图穿过传送门进入target地图时的落脚点（离回程传送门一段距离）"""
+        width, height = self.map_sizes[target]
+        for (x, y), back in PORTALS.get(target, []):
+            if back == origin:
+                dx, dy = width // 2 - x, height // 2 - y
+                length = max(1.0, (dx * dx + dy * dy) ** 0.5)
+                step = PORTAL_RADIUS * 4
+                return int(x + dx / length * step), int(y + dy / length * step)
+        return None
+
+    def update_camera(self):
+        """相机跟随玩家，不超出地图边界"""
+        self.camera_x = -min(max(self.player_x - SCREEN_WIDTH // 2, 0), max(0, self.map_width - SCREEN_WIDTH))
+        self.camera_y = -min(max(self.player_y - SCREEN_HEIGHT // 2, 0), max(0, self.map_height - SCREEN_HEIGHT))
+
+    def update(self, keys, events):
+        """
+        推进一个tick
+        :param keys: 可按键常量索引的按键状态（pygame.key.get_pressed()或KeyState）
+        :param events: 本tick的事件列表
+        :return: 游戏是否继续运行
+        """
+        self.tick += 1
+        with profiler.phase('handle_events'):
+            self.handle_events(events)
+        if not self.running:
+            return False
+
+        if self.game_state == GameState.EXPLORING:
+            with profiler.phase('update_game_state'):
+                self.update_game_state(keys)
+            if self.shared_slimes is None:
+                with profiler.phase('npc_update'):
+                    self.update_slimes()
+        elif self.game_state == GameState.BATTLE:
+            with profiler.phase('update_game_state'):
+                self.update_battle()
+        return True
+
+    def handle_events(self, events):
+        """处理所有游戏事件"""
+        for event in events:
+            if event.type == pygame.QUIT:
+                self.running = False  # 退出游戏
+
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    if self.game_state == GameState.DIALOG:
+                        self.game_state = GameState.EXPLORING
+                    else:
+                        self.running = False
+
+                elif event.key == pygame.K_r and self.game_state == GameState.GAME_OVER:
+                    self.restart()
+
+                elif event.key == pygame.K_SPACE:
+                    self.handle_space()
+
+                elif event.key in BATTLE_KEYS and self.game_state == GameState.BATTLE:
+                    self.battle_action(BATTLE_KEYS[event.key])
+
+            elif event.type == pygame.MOUSEBUTTONDOWN and self.game_state == GameState.BATTLE:
+                for rect, action in BATTLE_BUTTONS:
+                    if rect.collidepoint(event.pos):
+                        self.battle_action(action)
+
+    def handle_space(self):
+        if self.game_state == GameState.DIALOG:
+            self.current_dialog += 1
+            if self.current_dialog >= len(self.dialog_lines):
+                self.game_state = GameState.EXPLORING
+        elif self.game_state == GameState.EXPLORING and self.show_exclamation:
+            self.current_dialog = 0
+            self.game_state = GameState.DIALOG
+        elif self.game_state == GameState.BATTLE and self.battle_outcome != ONGOING:
+            # 战斗结束后按空格继续
+            self.finish_battle()
+        elif self.game_state == GameState.LEVEL_UP:
+            self.game_state = GameState.EXPLORING
+
+    def update_game_state(self, keys):
+        """更新游戏状态（探索模式下）"""
+        player = self.player
+        dx, dy = 0, 0
+        if keys[pygame.K_LEFT] or keys[pygame.K_a]:
+            dx = -player.speed
+            self.current_direction = 'left'
+        if keys[pygame.K_RIGHT] or keys[pygame.K_d]:
+            dx = player.speed
+            self.current_direction = 'right'
+        if keys[pygame.K_UP] or keys[pygame.K_w]:
+            dy = -player.speed
+            self.current_direction = 'up'
+        if keys[pygame.K_DOWN] or keys[pygame.K_s]:
+            dy = player.speed
+            self.current_direction = 'down'
+
+        # 更新玩家位置、动画帧和遇敌逻辑
+        if dx != 0 or dy != 0:
+            x = min(max(self.player_x + dx, 0), self.map_width - 1)
+            y = min(max(self.player_y + dy, 0), self.map_height - 1)
+            if self.walk is not None:
+                x, y = self.collide(x, y)
+            self.player_x, self.player_y = x, y
+            self.update_camera()
+
+            self.animation_counter += 1
+            if self.animation_counter >= ANIMATION_SPEED:
+                self.animation_counter = 0
+                self.current_frame = (self.current_frame + 1) % PLAYER_FRAME_COUNT
+
+            self.steps_since_last_battle += 1
+            if self.steps_since_last_battle > 30 and self.rng.random() < 0.02:  # 遇敌概率2%
+                self.start_battle()
+                return
+        else:
+            self.current_frame = 0
+
+        # 检测是否靠近治安官或走进传送门
+        nearby = self.spatial.query_radius(self.player_x, self.player_y, 0)
+        self.show_exclamation = OFFICER in nearby
+        for entity in nearby:
+            if entity[0] == 'portal':
+                # 走进传送门时切换地图
+                self.enter_map(entity[1], self.arrival_point(entity[1], self.map_type))
+                break
+
+    def collide(self, x, y):
+        """玩家要走到(x, y)时的碰撞处理：撞到障碍时沿另一条轴滑动"""
+        walk = self.walk
+        if walk.is_walkable(x, y) or not walk.is_walkable(self.player_x, self.player_y):
+            return x, y
+        if walk.is_walkable(x, self.player_y):
+            return x, self.player_y
+        if walk.is_walkable(self.player_x, y):
+            return self.player_x, y
+        return self.player_x, self.player_y
+
+    def start_battle(self):
+        area_level = 1 if self.map_type == "village" else 2 if self.map_type == "hubei" else 3
+        self.current_monster = monster_pool.acquire(area_level)
+        self.game_state = GameState.BATTLE
+        self.battle_message = f"遭遇了{self.current_monster.name}！"
+        self.battle_outcome = ONGOING
+        self.leveled_up = False
+        self.steps_since_last_battle = 0
+
+    def battle_action(self, action):
+        """玩家选择战斗动作，结算一个回合"""
+        if self.battle_outcome != ONGOING:
+            return
+        outcome, self.battle_message, self.leveled_up = resolve_turn(
+            self.player, self.current_monster, action, self.rng)
+        self.battle_outcome = outcome
+        if outcome in (ONGOING, LOST):
+            self.monster_attack_timer = MONSTER_ATTACK_TICKS
+
+    def finish_battle(self):
+        if self.battle_outcome == LOST:
+            self.game_state = GameState.GAME_OVER
+        elif self.battle_outcome == WON and self.leveled_up:
+            self.game_state = GameState.LEVEL_UP
+        else:
+            self.game_state = GameState.EXPLORING
+        monster_pool.release(self.current_monster)
+        self.current_monster = None
+        self.monster_attack_timer = 0
+
+    def update_battle(self):
+        """更新怪物攻击动画计时（史莱姆的待机动画由渲染端按时间播放）"""
+        if self.monster_attack_timer > 0:
+            self.monster_attack_timer -= 1
+
+
+class ScriptedInput:
+    """
+    脚本输入
+    :param holds: [(开始tick, 结束tick, 按键)]，区间内按键保持按下
+    :param presses: [(tick, 按键)]，在该tick产生一次KEYDOWN事件
+    """
+
+    def __init__(self, holds=(), presses=()):
+        self.holds = sorted(holds)
+        self.presses = {}
+        for tick, key in presses:
+            self.presses.setdefault(tick, []).append(key)
+        self._next_hold = 0
+        self._active = []
+
+    def poll(self, tick):
+        """tick需要单调递增"""
+        while self._next_hold < len(self.holds) and self.holds[self._next_hold][0] <= tick:
+            self._active.append(self.holds[self._next_hold])
+            self._next_hold += 1
+        self._active = [hold for hold in self._active if hold[1] > tick]
+        keys = KeyState(key for start, end, key in self._active)
+        events = [pygame.event.Event(pygame.KEYDOWN, key=key) for key in self.presses.get(tick, ())]
+        return keys, events
+
+
+def run_headless(world, input_source, ticks):
+    """
+    不开窗口，以CPU允许的最快速度推进最多ticks个tick
+    :return: 实际推进的tick数和每秒tick数
+    """
+    start = time.perf_counter()
+    done = 0
+    while done < ticks:
+        keys, events = input_source.poll(world.tick)
+        if not world.update(keys, events):
+            break
+        done += 1
+    elapsed = time.perf_counter() - start
+    return done, done / elapsed if elapsed > 0 else float('inf')
+
+
+def patrol_input(ticks):
+    """在地图上来回走动、战斗中一直攻击、失败后重新开始的示例脚本"""
+    holds, presses = [], []
+    directions = [pygame.K_RIGHT, pygame.K_DOWN, pygame.K_LEFT, pygame.K_UP]
+    for i, start in enumerate(range(0, ticks, 120)):
+        holds.append((start, start + 120, directions[i % 4]))
+    for tick in range(0, ticks, 15):
+        presses.append((tick, pygame.K_1))
+        presses.append((tick + 7, pygame.K_SPACE))
+        presses.append((tick + 11, pygame.K_r))
+    return ScriptedInput(holds, presses)
+
+
+if __name__ == "__main__":
+    from assets import map_sizes
+    from navigation import walk_grid
+
+    parser = argparse.ArgumentParser(description="无窗口运行游戏逻辑")
+    parser.add_argument('--ticks', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    world = GameWorld(map_sizes(), walk_grid=walk_grid)
+    done, rate = run_headless(world, patrol_input(args.ticks), args.ticks)
+    print(f"{done} ticks, {rate:.0f} ticks/s ({rate / TICK_RATE:.0f}x 实时)")
+    print(f"等级 {world.player.level}, HP {world.player.hp}/{world.player.max_hp}, "
+          f"金币 {world.player.gold}, 地图 {world.map_type}, 状态 {world.game_state.name}")
\ No newline at end of file
@@ -0,0 +1,310 @@
+import argparse
+import multiprocessing
+import os
+import random
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+from config import *
+from assets import map_sizes
+from engine import GameWorld, KeyState
+from game_state import GameState
+from navigation import walk_grid
+from observation import PixelObserver, observation_shape
+
+# 离散动作：(持续按住的方向键, 第一个tick按下的键)
+ACTIONS = [
+    (None, None),              # 不动
+    (pygame.K_LEFT, None),
+    (pygame.K_RIGHT, None),
+    (pygame.K_UP, None),
+    (pygame.K_DOWN, None),
+    (None, pygame.K_1),        # 攻击
+    (None, pygame.K_2),        # 防御
+    (None, pygame.K_3),        # 逃跑
+    (None, pygame.K_SPACE),    # 对话/确认
+]
+ACTION_KEYS = [KeyState([] if held is None else [held]) for held, _ in ACTIONS]
+ACTION_EVENTS = [[] if pressed is None else [pygame.event.Event(pygame.KEYDOWN, key=pressed)]
+                 for _, pressed in ACTIONS]
+
+STATES = list(GameState)
+MAP_NAMES = list(MAP_FILES)
+
+# 观测向量：玩家位置和属性、状态和地图的one-hot、当前怪物属性
+OBS_SIZE = 10 + len(STATES) + len(MAP_NAMES) + 3
+
+
+def observe(world, out):
+    """把GameWorld的状态写进长度为OBS_SIZE的float32数组out"""
+    player = world.player
+    out[:] = 0.0
+    out[0] = world.player_x / world.map_width
+    out[1] = world.player_y / world.map_height
+    out[2] = player.hp / player.max_hp
+    out[3] = player.level / 10
+    out[4] = player.exp / player.exp_to_level
+    out[5] = player.gold / 1000
+    out[6] = player.attack / 100
+    out[7] = player.defense / 100
+    out[8] = world.show_exclamation
+    out[9] = min(world.steps_since_last_battle, 100) / 100
+    out[10 + STATES.index(world.game_state)] = 1.0
+    out[10 + len(STATES) + MAP_NAMES.index(world.map_type)] = 1.0
+    monster = world.current_monster
+    if monster is not None:
+        base = 10 + len(STATES) + len(MAP_NAMES)
+        out[base] = monster.hp / monster.max_hp
+        out[base + 1] = monster.attack / 100
+        out[base + 2] = monster.defense / 100
+    return out
+
+
+def observation_spec(pixels=None):
+    """观测的(形状, 类型)；pixels为PixelObserver的参数字典，为None时是状态向量"""
+    if pixels is None:
+        return (OBS_SIZE,), np.float32
+    return observation_shape(pixels.get('size', OBS_PIXEL_SIZE), pixels.get('gray', True)), np.uint8
+
+
+class GameEnv:
+    """
+    Gym风格的无窗口游戏环境
+    reset(seed) -> (观测, info)，step(动作编号) -> (观测, 奖励, terminated, truncated, info)
+    奖励：获得的金币/10 + 升级数，死亡时-1
+    :param pixels: 给出时观测为画面像素，内容是PixelObserver的参数（如{'size': (84, 84), 'gray': True}）
+    """
+
+    def __init__(self, map_type='village', frame_skip=ENV_FRAME_SKIP, max_steps=ENV_MAX_STEPS, navigation=True,
+                 pixels=None):
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.rng = random.Random()
+        self.world = GameWorld(map_sizes(), map_type, walk_grid if navigation else None, rng=self.rng)
+        self.observer = None if pixels is None else PixelObserver(**pixels)
+        shape, dtype = observation_spec(pixels)
+        self.obs = np.zeros(shape, dtype=dtype)
+        self.steps = 0
+        self.last_gold = self.last_level = 0
+
+    def reset(self, seed=None):
+        self.rng.seed(seed)
+        self.world.reset()
+        self.steps = 0
+        self.last_gold, self.last_level = self.world.player.gold, self.world.player.level
+        return self.observe_into(self.obs).copy(), self.info()
+
+    def step(self, action):
+        reward, terminated, truncated = self.advance(action)
+        return self.observe_into(self.obs).copy(), reward, terminated, truncated, self.info()
+
+    def observe_into(self, out):
+        """把当前观测写进out"""
+        if self.observer is not None:
+            return self.observer.observe(self.world, out)
+        return observe(self.world, out)
+
+    def advance(self, action):
+        """推进frame_skip个tick但不生成观测，返回(奖励, terminated, truncated)"""
+        world = self.world
+        keys, events = ACTION_KEYS[action], ACTION_EVENTS[action]
+        world.update(keys, events)
+        for _ in range(self.frame_skip - 1):
+            if world.game_state == GameState.GAME_OVER:
+                break
+            world.update(keys, ())
+        self.steps += 1
+
+        player = world.player
+        reward = (player.gold - self.last_gold) / 10 + (player.level - self.last_level)
+        self.last_gold, self.last_level = player.gold, player.level
+        terminated = world.game_state == GameState.GAME_OVER
+        if terminated:
+            reward -= 1.0
+        return reward, terminated, self.steps >= self.max_steps
+
+    def info(self):
+        world = self.world
+        return {'state': world.game_state.name, 'map': world.map_type, 'level': world.player.level,
+                'gold': world.player.gold, 'steps': self.steps}
+
+
+def buffer_layout(n, pixels=None):
+    """批量环境共享缓冲区中各数组的(名字, 类型, 形状, 偏移)，以及总字节数"""
+    obs_shape, obs_dtype = observation_spec(pixels)
+    layout, offset = [], 0
+    for name, dtype, shape in (('obs', obs_dtype, (n,) + obs_shape), ('actions', np.int64, (n,)),
+                               ('rewards', np.float32, (n,)), ('terminated', np.bool_, (n,)),
+                               ('truncated', np.bool_, (n,))):
+        layout.append((name, dtype, shape, offset))
+        offset += np.dtype(dtype).itemsize * int(np.prod(shape))
+        offset = -(-offset // 8) * 8
+    return layout, offset
+
+
+def buffer_views(buffer, n, pixels=None):
+    """在一块内存（bytearray或SharedMemory.buf）上建立各数组的NumPy视图"""
+    layout, _ = buffer_layout(n, pixels)
+    return {name: np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            for name, dtype, shape, offset in layout}
+
+
+def step_slice(envs, start, views):
+    """
+    按views['actions']推进envs（对应批量中从start开始的几个），结果写回views
+    结束的环境自动reset，写回的是新一局的第一个观测
+    """
+    obs, actions = views['obs'], views['actions']
+    rewards, terminated, truncated = views['rewards'], views['terminated'], views['truncated']
+    for i, env in enumerate(envs, start):
+        reward, done, cut = env.advance(actions[i])
+        rewards[i], terminated[i], truncated[i] = reward, done, cut
+        if done or cut:
+            env.reset()
+        env.observe_into(obs[i])
+
+
+def reset_slice(envs, start, views, seed):
+    for i, env in enumerate(envs, start):
+        env.reset(None if seed is None else seed + i)
+        env.observe_into(views['obs'][i])
+
+
+class SyncVectorEnv:
+    """
+    在当前进程里同步推进n个环境
+    reset(seed) -> 观测(n, ...)，step(动作数组) -> (观测, 奖励, terminated, truncated)
+    返回的数组是内部缓冲区，下一次step会被覆盖
+    """
+
+    def __init__(self, n, **env_kwargs):
+        self.n = n
+        self.envs = [GameEnv(**env_kwargs) for _ in range(n)]
+        pixels = env_kwargs.get('pixels')
+        self.views = buffer_views(bytearray(buffer_layout(n, pixels)[1]), n, pixels)
+
+    def reset(self, seed=None):
+        reset_slice(self.envs, 0, self.views, seed)
+        return self.views['obs']
+
+    def step(self, actions):
+        views = self.views
+        views['actions'][:] = actions
+        step_slice(self.envs, 0, views)
+        return views['obs'], views['rewards'], views['terminated'], views['truncated']
+
+    def close(self):
+        pass
+
+
+def _worker(pipe, shm_name, n, start, count, env_kwargs):
+    """子进程：负责批量中[start, start + count)的环境，结果直接写进共享内存"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    views = buffer_views(shm.buf, n, env_kwargs.get('pixels'))
+    envs = [GameEnv(**env_kwargs) for _ in range(count)]
+    try:
+        while True:
+            command, arg = pipe.recv()
+            if command == 'step':
+                step_slice(envs, start, views)
+            elif command == 'reset':
+                reset_slice(envs, start, views, arg)
+            else:
+                break
+            pipe.send(None)
+    finally:
+        del views
+        shm.close()
+
+
+class ProcessVectorEnv:
+    """
+    把n个环境平均分给workers个子进程同步推进
+    观测、动作和奖励都在共享内存里，进程间只传递很短的命令
+    """
+
+    def __init__(self, n, workers=None, **env_kwargs):
+        self.n = n
+        workers = min(n, workers or os.cpu_count() or 1)
+        pixels = env_kwargs.get('pixels')
+        self.shm = shared_memory.SharedMemory(create=True, size=buffer_layout(n, pixels)[1])
+        self.views = buffer_views(self.shm.buf, n, pixels)
+        self.pipes, self.processes = [], []
+        bounds = np.linspace(0, n, workers + 1).astype(int)
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            parent, child = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_worker, args=(child, self.shm.name, n, int(start), int(stop - start), env_kwargs),
+                daemon=True)
+            process.start()
+            self.pipes.append(parent)
+            self.processes.append(process)
+
+    def _broadcast(self, command, arg=None):
+        for pipe in self.pipes:
+            pipe.send((command, arg))
+        for pipe in self.pipes:
+            pipe.recv()
+
+    def reset(self, seed=None):
+        self._broadcast('reset', seed)
+        return self.views['obs']
+
+    def step(self, actions):
+        views = self.views
+        views['actions'][:] = actions
+        self._broadcast('step')
+        return views['obs'], views['rewards'], views['terminated'], views['truncated']
+
+    def close(self):
+        if self.shm is None:
+            return
+        for pipe in self.pipes:
+            pipe.send(('close', None))
+        for process in self.processes:
+            process.join()
+        self.views = None
+        self.shm.close()
+        self.shm.unlink()
+        self.shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def steps_per_second(env, steps, seed=0):
+    """用随机动作推进批量环境，返回每秒的环境步数（所有环境合计）"""
+    rng = np.random.default_rng(seed)
+    env.reset(seed)
+    actions = rng.integers(0, len(ACTIONS), size=(steps, env.n))
+    start = time.perf_counter()
+    for row in actions:
+        env.step(row)
+    return steps * env.n / (time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="训练环境的吞吐量测试（随机动作）")
+    parser.add_argument('--envs', type=int, default=64)
+    parser.add_argument('--steps', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--pixels', action='store_true', help="使用灰度像素观测（OBS_PIXEL_SIZE）")
+    args = parser.parse_args()
+
+    # 像素观测在虚拟显示驱动上渲染，不需要窗口
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env_kwargs = {'pixels': {}} if args.pixels else {}
+
+    sync = SyncVectorEnv(args.envs, **env_kwargs)
+    rate = steps_per_second(sync, args.steps)
+    print(f"SyncVectorEnv({args.envs}): {rate:.0f} 步/秒 ({rate * ENV_FRAME_SKIP:.0f} tick/秒)")
+
+    with ProcessVectorEnv(args.envs, args.workers, **env_kwargs) as pool:
+        rate = steps_per_second(pool, args.steps)
+    print(f"ProcessVectorEnv({args.envs}, {args.workers}进程): {rate:.0f} 步/秒 "
+          f"({rate / args.workers:.0f} 步/秒/进程)")
\ No newline at end of file
@@ -0,0 +1,94 @@
+import json
+import os
+
+import pygame
+from config import *
+
+# 可能安装字体的目录，任何一个有变动时重新查找之前没找到的字体
+FONT_DIRS = [
+    '/usr/share/fonts', '/usr/local/share/fonts', os.path.expanduser('~/.fonts'),
+    os.path.expanduser('~/.local/share/fonts'), '/Library/Fonts', '/System/Library/Fonts',
+    os.path.join(os.environ.get('WINDIR', 'C:\\Windows'), 'Fonts'),
+]
+
+_cache = None
+_reported_missing = set()
+
+
+def font_dirs_signature():
+    """字体目录的最后修改时间，用来判断是否装了新字体"""
+    signature = 0.0
+    for path in FONT_DIRS:
+        try:
+            signature = max(signature, os.stat(path).st_mtime)
+        except OSError:
+            pass
+    return signature
+
+
+def _load_cache():
+    global _cache
+    if _cache is None:
+        try:
+            with open(FONT_CACHE_FILE, encoding='utf-8') as f:
+                _cache = json.load(f)
+        except (OSError, ValueError):
+            _cache = {}
+    return _cache
+
+
+def _save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_FILE), exist_ok=True)
+        tmp_path = FONT_CACHE_FILE + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, FONT_CACHE_FILE)
+    except OSError as e:
+        print(f"字体缓存写入失败: {e}")
+
+
+def resolve_font(name):
+    """
+    查找系统字体文件的路径，找不到时返回None
+    pygame.font.match_font在Linux上要调用fc-list枚举所有字体，结果缓存到磁盘，之后启动不再枚举
+    """
+    cache = _load_cache()
+    entry = cache.get(name)
+    if entry is not None:
+        path, signature = entry
+        if path is not None and os.path.exists(path):
+            return path
+        if path is None and signature == font_dirs_signature():
+            return None
+
+    path = pygame.font.match_font(name)
+    cache[name] = [path, font_dirs_signature()]
+    _save_cache(cache)
+    return path
+
+
+class LazyFont:
+    """第一次使用时才创建pygame.font.Font，其余用法与Font对象相同"""
+
+    __slots__ = ('name', 'point_size', '_font')
+
+    def __init__(self, name, point_size):
+        self.name = name
+        self.point_size = point_size
+        self._font = None
+
+    @property
+    def font(self):
+        if self._font is None:
+            if not pygame.font.get_init():
+                pygame.font.init()
+            path = resolve_font(self.name)
+            if path is None and self.name not in _reported_missing:
+                _reported_missing.add(self.name)
+                print(f"找不到字体{self.name}，使用pygame默认字体（中文可能无法显示）")
+            self._font = pygame.font.Font(path, self.point_size)
+        return self._font
+
+    def __getattr__(self, attr):
+        return getattr(self.font, attr)
\ No newline at end of file
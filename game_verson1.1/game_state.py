@@ -0,0 +1,10 @@
+from enum import Enum
+
+
+class GameState(Enum):
+    """游戏状态"""
+    EXPLORING = 1
+    BATTLE = 2
+    DIALOG = 3
+    LEVEL_UP = 4
+    GAME_OVER = 5
\ No newline at end of file
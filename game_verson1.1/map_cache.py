@@ -0,0 +1,99 @@
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import sys
+
+import pygame
+from config import *
+
+# 缓存文件头：魔数、版本、宽、高、像素格式
+CACHE_MAGIC = b'PGMC'
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct('<4sHII8s')
+
+
+def file_hash(filename):
+    """源图片内容的哈希，图片改动后缓存自动失效"""
+    with open(filename, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:16]
+
+
+def pixel_format():
+    """选择与显示Surface字节顺序一致的像素格式，避免blit时逐像素转换"""
+    display = pygame.display.get_surface()
+    if display is not None and sys.byteorder == 'little' and display.get_bitsize() == 32 \
+            and display.get_masks()[:3] == (0xff0000, 0xff00, 0xff):
+        return 'BGRA'
+    return 'RGBX'
+
+
+def cache_path(filename, scale, fmt):
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(MAP_CACHE_DIR, f"{stem}-{file_hash(filename)}-x{scale}-{fmt}.raw")
+
+
+def read_cache(path, fmt):
+    """把缓存文件内存映射回Surface，不做JPEG解码和缩放；缓存无效时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            # ACCESS_COPY: 写时复制，页面按需从文件读入
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < CACHE_HEADER.size:
+        return None
+    magic, version, width, height, stored_fmt = CACHE_HEADER.unpack_from(buffer)
+    stored_fmt = stored_fmt.rstrip(b'\0').decode('ascii')
+    if magic != CACHE_MAGIC or version != CACHE_VERSION or stored_fmt != fmt \
+            or len(buffer) != CACHE_HEADER.size + width * height * 4:
+        return None
+
+    surface = pygame.image.frombuffer(memoryview(buffer)[CACHE_HEADER.size:], (width, height), fmt)
+    # 'BGRA'得到的是带逐像素透明度的Surface，地图不透明，关掉透明度否则每次blit都要混合
+    surface.set_alpha(None)
+    return surface
+
+
+def write_cache(path, surface, fmt):
+    """原子写入缓存文件，并删除同一张图片内容或放大倍数已过期的缓存（保留其他像素格式的）"""
+    os.makedirs(MAP_CACHE_DIR, exist_ok=True)
+    width, height = surface.get_size()
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, width, height, fmt.encode('ascii'))
+
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(pygame.image.tobytes(surface, fmt))
+    os.replace(tmp_path, path)
+
+    stem, digest, scale, _ = os.path.basename(path).rsplit('-', 3)
+    for stale in glob.glob(os.path.join(MAP_CACHE_DIR, f"{stem}-*.raw")):
+        parts = os.path.basename(stale).rsplit('-', 3)
+        if len(parts) == 4 and parts[0] == stem and parts[1:3] != [digest, scale]:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def load_scaled_map(filename, scale=MAP_SCALE):
+    """读取按scale放大的地图，优先使用磁盘缓存"""
+    fmt = pixel_format()
+    path = cache_path(filename, scale, fmt)
+    surface = read_cache(path, fmt)
+    if surface is not None:
+        return surface
+
+    original = pygame.image.load(filename).convert()
+    surface = pygame.transform.scale(
+        original,
+        (original.get_width() * scale, original.get_height() * scale)
+    )
+    try:
+        write_cache(path, surface, fmt)
+    except OSError as e:
+        print(f"地图缓存写入失败: {e}")
+    return surface
\ No newline at end of file
@@ -0,0 +1,83 @@
+import pygame
+from config import *
+
+
+class TiledMap:
+    """把缩放后的大地图切成固定大小的图块，每帧只绘制与相机相交的图块"""
+
+    def __init__(self, surface, tile_size=TILE_SIZE):
+        self.width, self.height = surface.get_size()
+        self.tile_size = tile_size
+        self.cols = (self.width + tile_size - 1) // tile_size
+        self.rows = (self.height + tile_size - 1) // tile_size
+
+        # 图块是原图的子Surface，与资源缓存中的地图共用像素数据
+        # 子Surface不继承set_alpha(None)，原图不透明时图块也要关掉透明度，否则blit时逐像素混合
+        opaque = not surface.get_flags() & pygame.SRCALPHA
+        self.tiles = []
+        for row in range(self.rows):
+            tile_row = []
+            for col in range(self.cols):
+                rect = pygame.Rect(col * tile_size, row * tile_size, tile_size, tile_size)
+                rect = rect.clip(pygame.Rect(0, 0, self.width, self.height))
+                tile = surface.subsurface(rect)
+                if opaque:
+                    tile.set_alpha(None)
+                tile_row.append(tile)
+            self.tiles.append(tile_row)
+
+        self._last_camera = None
+
+    def get_size(self):
+        return self.width, self.height
+
+    def invalidate(self):
+        """强制下一次绘制整屏重画（切换地图、从战斗返回等）"""
+        self._last_camera = None
+
+    def visible_tiles(self, camera_x, camera_y, view_rect):
+        """返回与屏幕区域view_rect相交的图块及其屏幕坐标"""
+        ts = self.tile_size
+        # 屏幕区域换算到地图坐标
+        left = max(0, (view_rect.left - camera_x) // ts)
+        top = max(0, (view_rect.top - camera_y) // ts)
+        right = min(self.cols, (view_rect.right - camera_x + ts - 1) // ts)
+        bottom = min(self.rows, (view_rect.bottom - camera_y + ts - 1) // ts)
+
+        for row in range(top, bottom):
+            tile_row = self.tiles[row]
+            for col in range(left, right):
+                yield tile_row[col], (col * ts + camera_x, row * ts + camera_y)
+
+    def _draw_region(self, screen, camera_x, camera_y, region):
+        for tile, pos in self.visible_tiles(camera_x, camera_y, region):
+            # 只拷贝图块落在region内的部分
+            area = region.clip(pygame.Rect(pos, tile.get_size()))
+            if area.width and area.height:
+                screen.blit(tile, area.topleft, area.move(-pos[0], -pos[1]))
+
+    def draw(self, screen, camera_x, camera_y, dirty_rects=None):
+        """
+        绘制地图
+        :param dirty_rects: 相机未移动时需要重画的屏幕区域（例如HUD下方）
+        :return: 本次更新过的屏幕矩形列表
+        """
+        camera_x, camera_y = int(camera_x), int(camera_y)
+        view = screen.get_rect()
+
+        if self._last_camera != (camera_x, camera_y):
+            # 相机移动过：重画整个可见区域
+            self._last_camera = (camera_x, camera_y)
+            screen.fill(BLACK)
+            self._draw_region(screen, camera_x, camera_y, view)
+            return [view]
+
+        # 相机未移动：只修补被其他内容覆盖过的区域
+        updated = []
+        for rect in dirty_rects or ():
+            region = view.clip(rect)
+            if region.width and region.height:
+                screen.fill(BLACK, region)
+                self._draw_region(screen, camera_x, camera_y, region)
+                updated.append(region)
+        return updated
\ No newline at end of file
@@ -0,0 +1,225 @@
+import argparse
+import itertools
+import os
+import threading
+import weakref
+from collections import Counter, deque
+
+from config import *
+
+# 报告中的资源类别（按显示顺序）
+CATEGORIES = ['maps', 'sprites', 'ui', 'text']
+
+
+def surface_bytes(surface):
+    """Surface像素数据占用的字节数"""
+    return surface.get_pitch() * surface.get_height()
+
+
+class SurfaceRecord:
+    __slots__ = ('category', 'owner', 'size', 'bitsize', 'nbytes', 'frame')
+
+    def __init__(self, category, owner, size, bitsize, nbytes, frame):
+        self.category = category
+        self.owner = owner
+        self.size = size
+        self.bitsize = bitsize
+        self.nbytes = nbytes
+        self.frame = frame
+
+
+class SurfaceTracker:
+    """
+    记录经过track()创建的每个Surface（类别、所属、尺寸、像素格式），Surface被回收时自动移除
+    关闭时track()直接返回，几乎没有开销；需要在加载资源之前打开才能统计到全部资源
+    """
+
+    def __init__(self, window=MEMTRACK_WINDOW, churn_ratio=MEMTRACK_CHURN_RATIO, limits=ASSET_SIZE_LIMITS):
+        self.enabled = False
+        self.window = window
+        self.churn_ratio = churn_ratio
+        self.limits = limits
+        self.frame = 0
+        self.live = {}
+        self.allocated = Counter()
+        self.frame_allocs = Counter()
+        self.recent = deque(maxlen=window)
+        self._ids = itertools.count()
+        self._last_counts = None
+        # 后台预加载线程也会创建Surface；回收回调可能在持有锁时触发，所以用可重入锁
+        self._lock = threading.RLock()
+
+    def track(self, surface, category, owner):
+        """登记一个新建的Surface，返回surface本身"""
+        if not self.enabled:
+            return surface
+        key = next(self._ids)
+        record = SurfaceRecord(category, owner, surface.get_size(), surface.get_bitsize(),
+                               surface_bytes(surface), self.frame)
+        with self._lock:
+            self.live[key] = record
+            self.allocated[category, owner] += 1
+            self.frame_allocs[category, owner] += 1
+        weakref.finalize(surface, self._release, key)
+        return surface
+
+    def _release(self, key):
+        with self._lock:
+            self.live.pop(key, None)
+
+    def next_frame(self):
+        """每渲染一帧调用一次，用于找出每帧都在分配的地方"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.recent.append(self.frame_allocs)
+            self.frame_allocs = Counter()
+            self.frame += 1
+
+    def records(self):
+        with self._lock:
+            return list(self.live.values())
+
+    def usage(self):
+        """{类别: (存活数量, 字节数)}"""
+        usage = {category: [0, 0] for category in CATEGORIES}
+        for record in self.records():
+            entry = usage.setdefault(record.category, [0, 0])
+            entry[0] += 1
+            entry[1] += record.nbytes
+        return {category: tuple(entry) for category, entry in usage.items()}
+
+    def per_frame(self):
+        """
+        最近window帧里超过churn_ratio比例的帧都在分配Surface的(类别, 所属)
+        :return: [(类别, 所属, 有分配的帧数, 分配次数)]，按帧数从多到少
+        """
+        with self._lock:
+            frames = list(self.recent)
+        if len(frames) < self.window // 2:
+            return []
+        hits, counts = Counter(), Counter()
+        for allocs in frames:
+            hits.update(allocs.keys())
+            counts.update(allocs)
+        return [(category, owner, hit, counts[category, owner])
+                for (category, owner), hit in hits.most_common() if hit >= len(frames) * self.churn_ratio]
+
+    def oversized(self):
+        """尺寸超过所属类别上限的存活Surface（同一所属只报告一次）"""
+        found = {}
+        for record in self.records():
+            limit = self.limits.get(record.category)
+            if limit and (record.size[0] > limit[0] or record.size[1] > limit[1]):
+                found.setdefault((record.category, record.owner), (record, limit))
+        return list(found.values())
+
+    def growth(self):
+        """与上一次报告相比存活数量增加的所属，可能是泄漏；第一次报告只记录基准"""
+        counts = Counter((record.category, record.owner) for record in self.records())
+        last, self._last_counts = self._last_counts, counts
+        if last is None:
+            return []
+        grown = [(key, counts[key] - last[key]) for key in counts if counts[key] > last[key]]
+        return sorted(grown, key=lambda item: -item[1])
+
+    def summary_lines(self):
+        """性能分析面板上显示的简短统计"""
+        lines = [f"{category:<8}{count:5d} 个 {nbytes / 2 ** 20:7.2f} MB"
+                 for category, (count, nbytes) in self.usage().items()]
+        churn = self.per_frame()
+        if churn:
+            lines.append(f"每帧分配 {len(churn)} 处: {churn[0][0]}/{churn[0][1]}")
+        return lines
+
+    def report(self, top=10):
+        """完整的内存报告：按类别汇总、最大的Surface、每帧分配、疑似泄漏和过大的资源"""
+        if not self.enabled:
+            return "内存统计未开启（启动时加 --memory）"
+        usage = self.usage()
+        total = sum(nbytes for _, nbytes in usage.values())
+        lines = [f"已跟踪Surface {total / 2 ** 20:.2f} MB（第{self.frame}帧）"]
+        for category, (count, nbytes) in usage.items():
+            lines.append(f"  {category:<8}{count:6d} 个 {nbytes / 2 ** 20:9.2f} MB")
+
+        by_owner = {}
+        for record in self.records():
+            entry = by_owner.setdefault((record.category, record.owner), [0, 0, record])
+            entry[0] += 1
+            entry[1] += record.nbytes
+        lines.append(f"占用最多的{top}项:")
+        for (category, owner), (count, nbytes, record) in sorted(
+                by_owner.items(), key=lambda item: -item[1][1])[:top]:
+            width, height = record.size
+            lines.append(f"  {category}/{owner}: {count} 个 {nbytes / 1024:9.1f} KB"
+                         f"（例如 {width}x{height} {record.bitsize}位）")
+
+        churn = self.per_frame()
+        if churn:
+            lines.append(f"每帧都在分配（最近{len(self.recent)}帧）:")
+            for category, owner, hit, count in churn:
+                lines.append(f"  {category}/{owner}: {hit} 帧共 {count} 次")
+
+        grown = self.growth()
+        if grown:
+            lines.append("存活数量比上次报告增加（可能泄漏）:")
+            for (category, owner), delta in grown[:top]:
+                lines.append(f"  {category}/{owner}: +{delta}")
+
+        oversized = self.oversized()
+        if oversized:
+            lines.append("超过尺寸上限的资源:")
+            for record, (max_width, max_height) in oversized:
+                width, height = record.size
+                lines.append(f"  {record.category}/{record.owner}: {width}x{height}，上限 {max_width}x{max_height}，"
+                             f"{record.nbytes / 1024:.1f} KB")
+        return '\n'.join(lines)
+
+
+# 全局的Surface统计，资源加载和界面代码共用
+memtrack = SurfaceTracker()
+
+
+def track_surface(surface, category, owner):
+    return memtrack.track(surface, category, owner)
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from assets import AssetManager, map_sizes
+    from engine import GameWorld, patrol_input
+    from navigation import walk_grid
+    from profiler import profiler
+    from render import WorldRenderer
+    from ui import draw_profiler_overlay
+    # 作为脚本运行时本文件是__main__模块，其他模块用的是导入的memtrack模块里的全局统计
+    from memtrack import memtrack
+
+    parser = argparse.ArgumentParser(description="加载全部资源并无窗口渲染若干帧，输出内存报告")
+    parser.add_argument('--frames', type=int, default=600)
+    args = parser.parse_args()
+
+    memtrack.enabled = True
+    pygame.display.init()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    resources = AssetManager()
+    for key in resources:
+        resources[key]
+    for name in resources.maps:
+        resources.maps[name]
+    world = GameWorld(map_sizes(), walk_grid=walk_grid)
+    renderer = WorldRenderer(resources)
+    script = patrol_input(args.frames)
+    profiler.enabled = True
+    stats = {}
+    for _ in range(args.frames):
+        profiler.next_frame()
+        memtrack.next_frame()
+        world.update(*script.poll(world.tick))
+        renderer.draw(screen, world)
+        # 与main.py相同，每30帧刷新一次性能分析面板
+        if profiler.frames % 30 == 0 or not stats:
+            stats = profiler.percentiles()
+        draw_profiler_overlay(screen, stats, memtrack.summary_lines())
+    print(memtrack.report())
\ No newline at end of file
@@ -1,13 +1,41 @@
+from collections import namedtuple
+from operator import attrgetter
+
+# 每种怪物不变的属性，所有同种怪物共享一份（享元）
+MonsterSpecies = namedtuple('MonsterSpecies', 'name max_hp attack defense speed exp_reward gold_reward')
+
+SPECIES = {
+    1: MonsterSpecies("小史莱姆", 30, 8, 5, 3, 20, 10),
+    2: MonsterSpecies("大史莱姆", 50, 12, 8, 4, 35, 20),
+    3: MonsterSpecies("史莱姆王", 80, 18, 12, 5, 60, 40),
+}
+
+
+def species_for(area_level):
+    return SPECIES.get(area_level, SPECIES[3])
+
+
 class Monster:
-    def __init__(self, name, max_hp, attack, defense, speed, exp_reward, gold_reward):
-        self.name = name
-        self.max_hp = max_hp
-        self.hp = max_hp
-        self.attack = attack
-        self.defense = defense
-        self.speed = speed
-        self.exp_reward = exp_reward
-        self.gold_reward = gold_reward
+    """
+    怪物实例保存种类、当前HP和战斗公式每回合都要读的属性（复制到槽里，读取不经过property）
+    名字和奖励只在战斗开始和结束时读取，从种类模板读
+    """
+
+    __slots__ = ('species', 'hp', 'max_hp', 'attack', 'defense', 'speed')
+
+    name = property(attrgetter('species.name'))
+    exp_reward = property(attrgetter('species.exp_reward'))
+    gold_reward = property(attrgetter('species.gold_reward'))
+
+    def __init__(self, species):
+        self.reset(species)
+
+    def reset(self, species):
+        self.species = species
+        self.hp = self.max_hp = species.max_hp
+        self.attack = species.attack
+        self.defense = species.defense
+        self.speed = species.speed
 
     def take_damage(self, damage):
         actual_damage = max(1, damage)
@@ -16,10 +44,34 @@ class Monster:
             self.hp = 0
         return self.hp <= 0, actual_damage
 
+
+class MonsterPool:
+    """遇敌时复用战斗结束后归还的怪物对象"""
+
+    def __init__(self):
+        self.free = []
+        self.created = 0
+
+    def acquire(self, area_level):
+        species = species_for(area_level)
+        if self.free:
+            monster = self.free.pop()
+            monster.reset(species)
+            return monster
+        self.created += 1
+        return Monster(species)
+
+    def release(self, monster):
+        self.free.append(monster)
+
+
+# 游戏中遇敌共用的怪物池
+monster_pool = MonsterPool()
+
+
 def create_monster(area_level):
-    if area_level == 1:
-        return Monster("小史莱姆", 30, 8, 5, 3, 20, 10)
-    elif area_level == 2:
-        return Monster("大史莱姆", 50, 12, 8, 4, 35, 20)
-    else:
-        return Monster("史莱姆王", 80, 18, 12, 5, 60, 40)
\ No newline at end of file
+    """
+    新建一个不经过对象池的怪物，给战斗模拟和基准测试这类用完不归还的调用方
+    游戏内遇敌用monster_pool.acquire()，战斗结束后release()
+    """
+    return Monster(species_for(area_level))
\ No newline at end of file
@@ -0,0 +1,185 @@
+import hashlib
+import os
+
+import numpy as np
+import pygame
+from config import *
+
+# 4个邻居的偏移（行, 列），顺序与swarm.DIRECTIONS一致：下、左、右、上
+NEIGHBOR_OFFSETS = [(1, 0), (0, -1), (0, 1), (-1, 0)]
+
+# 流场中没有方向的格子（目标本身、不可达或超出范围）
+NO_DIRECTION = -1
+
+
+def source_hash(*filenames):
+    digest = hashlib.sha1()
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def mask_file(filename):
+    """地图对应的手绘通行遮罩（黑色为不可通行），没有时返回None"""
+    path = os.path.splitext(filename)[0] + '_mask.png'
+    return path if os.path.exists(path) else None
+
+
+def classify_pixels(filename):
+    """按源图片像素判断不可通行区域，返回(高, 宽)的布尔数组"""
+    mask = mask_file(filename)
+    if mask is not None:
+        rgb = pygame.surfarray.array3d(pygame.image.load(mask)).transpose(1, 0, 2)
+        return rgb.sum(axis=2) < 3 * 128
+    # 没有遮罩时把偏蓝/青的水面当作不可通行
+    rgb = pygame.surfarray.array3d(pygame.image.load(filename)).astype(np.int16).transpose(1, 0, 2)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    return (b > r + 50) & (b > 130) & (g > r + 20) & (b > g - 60)
+
+
+def build_blocked(filename, scale=MAP_SCALE, cell_size=NAV_CELL_SIZE):
+    """把源图片按格子汇总成通行网格，超过一半像素不可通行的格子算作障碍"""
+    blocked = classify_pixels(filename)
+    block = cell_size // scale
+    height, width = blocked.shape
+    rows, cols = -(-height // block), -(-width // block)
+    blocked = np.pad(blocked, ((0, rows * block - height), (0, cols * block - width)), mode='edge')
+    return blocked.reshape(rows, block, cols, block).mean(axis=(1, 3)) > 0.5
+
+
+def grid_cache_path(filename, scale, cell_size):
+    stem = os.path.splitext(os.path.basename(filename))[0]
+    sources = [filename] + ([mask_file(filename)] if mask_file(filename) else [])
+    return os.path.join(NAV_CACHE_DIR, f"{stem}-{source_hash(*sources)}-x{scale}-c{cell_size}.npy")
+
+
+def load_blocked(filename, scale=MAP_SCALE, cell_size=NAV_CELL_SIZE):
+    """读取通行网格，优先使用磁盘缓存"""
+    path = grid_cache_path(filename, scale, cell_size)
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        pass
+
+    blocked = build_blocked(filename, scale, cell_size)
+    try:
+        os.makedirs(NAV_CACHE_DIR, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, blocked)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"通行网格缓存写入失败: {e}")
+    return blocked
+
+
+class WalkGrid:
+    """
+    粗粒度的通行网格，坐标为缩放后的地图坐标
+    格子以外的位置都视为不可通行
+    """
+
+    def __init__(self, blocked, cell_size=NAV_CELL_SIZE):
+        self.cell_size = cell_size
+        self.blocked = blocked
+        self.rows, self.cols = blocked.shape
+
+    def clear(self, x, y, radius):
+        """把(x, y)周围radius以内的格子设为可通行（保证传送门等位置走得到）"""
+        size = self.cell_size
+        rows, cols = np.ogrid[:self.rows, :self.cols]
+        centers_x, centers_y = (cols + 0.5) * size, (rows + 0.5) * size
+        self.blocked[(centers_x - x) ** 2 + (centers_y - y) ** 2 <= radius * radius] = False
+
+    def cell(self, x, y):
+        return int(y // self.cell_size), int(x // self.cell_size)
+
+    def is_walkable(self, x, y):
+        row, col = int(y // self.cell_size), int(x // self.cell_size)
+        return 0 <= row < self.rows and 0 <= col < self.cols and not self.blocked[row, col]
+
+    def cells(self, xs, ys):
+        """批量计算格子坐标，超出网格的裁剪到边缘"""
+        rows = np.clip((ys // self.cell_size).astype(np.intp), 0, self.rows - 1)
+        cols = np.clip((xs // self.cell_size).astype(np.intp), 0, self.cols - 1)
+        return rows, cols
+
+    def walkable(self, xs, ys):
+        """is_walkable的批量版本"""
+        inside = (xs >= 0) & (ys >= 0) & (xs < self.cols * self.cell_size) & (ys < self.rows * self.cell_size)
+        rows, cols = self.cells(xs, ys)
+        return inside & ~self.blocked[rows, cols]
+
+
+class FlowField:
+    """
+    从一个或多个目标出发做广度优先搜索，每个格子记录走向目标的下一步方向
+    所有NPC共用一个流场，寻路的开销只有每次更新流场的一次搜索
+    """
+
+    def __init__(self, grid, max_distance=None):
+        self.grid = grid
+        self.max_distance = max_distance
+        self.targets = None
+        # 四周加一圈障碍，邻居下标不会越界；距离和方向都按加边后的格子展平保存
+        self.width = grid.cols + 2
+        padded = np.zeros((grid.rows + 2, self.width), dtype=bool)
+        padded[1:-1, 1:-1] = ~grid.blocked
+        self._open = padded.ravel()
+        self._offsets = np.array([dr * self.width + dc for dr, dc in NEIGHBOR_OFFSETS])
+        self.distance = np.full(self._open.size, -1, dtype=np.int32)
+        self.direction = np.full(self._open.size, NO_DIRECTION, dtype=np.int8)
+
+    def update(self, targets):
+        """
+        以targets（[(x, y)]）为目标重新计算流场；目标所在的格子没变时直接返回
+        开销只与搜索到的格子数有关，max_distance限制了搜索范围
+        :return: 是否重新计算了
+        """
+        grid = self.grid
+        cells = tuple(sorted({grid.cell(x, y) for x, y in targets}))
+        if cells == self.targets:
+            return False
+        self.targets = cells
+
+        distance = self.distance
+        direction = self.direction
+        distance.fill(-1)
+        direction.fill(NO_DIRECTION)
+        frontier = np.array([(row + 1) * self.width + col + 1 for row, col in cells
+                             if 0 <= row < grid.rows and 0 <= col < grid.cols], dtype=np.intp)
+        distance[frontier] = 0
+        step = 0
+        while frontier.size and (self.max_distance is None or step < self.max_distance):
+            step += 1
+            neighbors = np.unique((frontier[:, None] + self._offsets).ravel())
+            neighbors = neighbors[self._open[neighbors] & (distance[neighbors] < 0)]
+            distance[neighbors] = step
+            # 上一圈的格子一定是这一圈格子的邻居之一，朝它走即可
+            around = distance[neighbors[:, None] + self._offsets]
+            direction[neighbors] = np.argmax(around == step - 1, axis=1)
+            frontier = neighbors
+        return True
+
+    def lookup(self, xs, ys):
+        """批量查询位置对应格子的(方向, 距离)，距离-1表示不可达或超出搜索范围"""
+        rows, cols = self.grid.cells(xs, ys)
+        index = (rows + 1) * self.width + cols + 1
+        return self.direction[index], self.distance[index]
+
+
+_walk_grids = {}
+
+
+def walk_grid(map_type):
+    """各地图的通行网格（传送门和治安官附近保证可通行），第一次使用时加载"""
+    grid = _walk_grids.get(map_type)
+    if grid is None:
+        grid = WalkGrid(load_blocked(MAP_FILES[map_type]))
+        for (x, y), _ in PORTALS.get(map_type, []):
+            grid.clear(x, y, NAV_CLEARANCE)
+        if map_type == 'village':
+            grid.clear(OFFICER_POS[0], OFFICER_POS[1], NAV_CLEARANCE)
+        _walk_grids[map_type] = grid
+    return grid
\ No newline at end of file
@@ -0,0 +1,144 @@
+import struct
+
+import pygame
+from config import *
+from replay import TRACKED_KEYS
+
+# 消息类型
+MSG_HELLO = 1
+MSG_SNAPSHOT = 2
+MSG_INPUT = 3
+MSG_WELCOME = 4
+MSG_BYE = 5
+
+HELLO = struct.Struct('<B')
+BYE = struct.Struct('<BH')
+WELCOME = struct.Struct('<BH')
+# 类型, 客户端序号, 已确认的快照tick, 按住的键（位）, 按下的键（位）
+INPUT = struct.Struct('<BIIHB')
+# 类型, tick, 基准快照tick（0为完整快照）, 删除的实体数, 变化的实体数
+SNAPSHOT_HEADER = struct.Struct('<BIIHH')
+
+# 输入中按住的键与TRACKED_KEYS一致，按下的键如下（不包括ESC，断开连接用MSG_BYE）
+HELD_KEYS = TRACKED_KEYS
+PRESS_KEYS = [pygame.K_1, pygame.K_2, pygame.K_3, pygame.K_SPACE, pygame.K_r]
+
+# 实体种类
+KIND_PLAYER = 0
+KIND_SLIME = 1
+KIND_MONSTER = 2
+
+# 实体编号：玩家从1开始；史莱姆按地图分段；怪物是(MONSTER_ID_BASE + 所属玩家编号)
+SLIME_ID_BASE = 4096
+SLIMES_PER_MAP = 1024
+MONSTER_ID_BASE = 16384
+# 玩家编号不能进入史莱姆的编号段；服务器回收断开玩家的编号，用完时拒绝新连接
+MAX_PLAYERS = SLIME_ID_BASE - 1
+
+# 实体的字段和量化后的类型；坐标按POSITION_SCALE量化成整数
+FIELDS = [
+    ('kind', 'B'),
+    ('map', 'B'),
+    ('x', 'H'),
+    ('y', 'H'),
+    ('direction', 'B'),
+    ('frame', 'B'),
+    ('state', 'B'),
+    ('hp', 'H'),
+    ('max_hp', 'H'),
+    ('level', 'B'),
+    ('exp', 'H'),      # 只发给玩家自己
+    ('gold', 'I'),     # 只发给玩家自己
+]
+FIELD_NAMES = [name for name, _ in FIELDS]
+FIELD_INDEX = {name: i for i, name in enumerate(FIELD_NAMES)}
+ALL_FIELDS = (1 << len(FIELDS)) - 1
+ENTITY_HEADER = struct.Struct('<HH')  # 实体编号, 变化字段的位掩码
+
+_field_structs = {}
+
+
+def field_struct(mask):
+    """位掩码对应字段的打包格式（按掩码缓存）"""
+    packer = _field_structs.get(mask)
+    if packer is None:
+        packer = struct.Struct('<' + ''.join(fmt for i, (_, fmt) in enumerate(FIELDS) if mask >> i & 1))
+        _field_structs[mask] = packer
+    return packer
+
+
+def quantize(value):
+    return min(0xffff, max(0, int(round(value * POSITION_SCALE))))
+
+
+def dequantize(value):
+    return value / POSITION_SCALE
+
+
+def key_bits(keys, key_list):
+    """把按键集合编码成位"""
+    bits = 0
+    for i, key in enumerate(key_list):
+        if key in keys:
+            bits |= 1 << i
+    return bits
+
+
+def bits_keys(bits, key_list):
+    return [key for i, key in enumerate(key_list) if bits >> i & 1]
+
+
+def encode_snapshot(tick, snapshot, baseline_tick=0, baseline=None):
+    """
+    把快照（{实体编号: 量化后的字段元组}）编码成相对基准快照的增量
+    只发送新出现或有字段变化的实体，以及变化的字段；基准为None时发送完整快照
+    """
+    if baseline is None:
+        baseline_tick, baseline = 0, {}
+    removed = [entity_id for entity_id in baseline if entity_id not in snapshot]
+    parts = []
+    for entity_id, values in snapshot.items():
+        old = baseline.get(entity_id)
+        if old is None:
+            mask = ALL_FIELDS
+        elif old == values:
+            continue  # 大部分实体在两个快照之间没有变化，整体比较比逐字段比较快
+        else:
+            mask = 0
+            for i, (value, old_value) in enumerate(zip(values, old)):
+                if value != old_value:
+                    mask |= 1 << i
+        parts.append(ENTITY_HEADER.pack(entity_id, mask))
+        parts.append(field_struct(mask).pack(*[value for i, value in enumerate(values) if mask >> i & 1]))
+    header = SNAPSHOT_HEADER.pack(MSG_SNAPSHOT, tick, baseline_tick, len(removed), len(parts) // 2)
+    return header + struct.pack(f'<{len(removed)}H', *removed) + b''.join(parts)
+
+
+def decode_snapshot(data, baselines):
+    """
+    解码encode_snapshot的结果
+    :param baselines: {tick: 快照}，客户端保存的已收到的快照
+    :return: (tick, 快照)；基准快照已经丢弃时抛出KeyError
+    """
+    _, tick, baseline_tick, removed_count, count = SNAPSHOT_HEADER.unpack_from(data)
+    snapshot = dict(baselines[baseline_tick]) if baseline_tick else {}
+    offset = SNAPSHOT_HEADER.size
+    for entity_id in struct.unpack_from(f'<{removed_count}H', data, offset):
+        snapshot.pop(entity_id, None)
+    offset += 2 * removed_count
+    for _ in range(count):
+        entity_id, mask = ENTITY_HEADER.unpack_from(data, offset)
+        offset += ENTITY_HEADER.size
+        packer = field_struct(mask)
+        changed = packer.unpack_from(data, offset)
+        offset += packer.size
+        if mask == ALL_FIELDS:
+            snapshot[entity_id] = changed
+            continue
+        values = list(snapshot[entity_id])
+        changed = iter(changed)
+        for i in range(len(FIELDS)):
+            if mask >> i & 1:
+                values[i] = next(changed)
+        snapshot[entity_id] = tuple(values)
+    return tick, snapshot
\ No newline at end of file
@@ -0,0 +1,52 @@
+import random
+
+DIRECTIONS = ('down', 'left', 'right', 'up')
+
+
+class SlimeNPC:
+    """史莱姆NPC类，用于湖北地图的巡逻行为"""
+
+    __slots__ = ('x', 'y', 'direction', 'frame_index', 'animation_counter', 'move_counter', 'state')
+
+    # 所有史莱姆相同的参数放在类上共享
+    speed = 1.5
+    move_duration = 60
+    wait_duration = 30
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+        self.direction = 'down'
+        self.frame_index = 0
+        self.animation_counter = 0
+        self.move_counter = 0
+        self.state = 'moving'  # 'moving' 或 'waiting'
+
+    def update(self):
+        """更新史莱姆NPC的状态和位置"""
+        if self.state == 'moving':
+            self.move_counter += 1
+            if self.move_counter >= self.move_duration:
+                self.state = 'waiting'
+                self.move_counter = 0
+                self.direction = random.choice(DIRECTIONS)
+        else:
+            self.move_counter += 1
+            if self.move_counter >= self.wait_duration:
+                self.state = 'moving'
+                self.move_counter = 0
+
+        if self.state == 'moving':
+            if self.direction == 'down':
+                self.y += self.speed
+            elif self.direction == 'up':
+                self.y -= self.speed
+            elif self.direction == 'left':
+                self.x -= self.speed
+            elif self.direction == 'right':
+                self.x += self.speed
+
+        self.animation_counter += 1
+        if self.animation_counter >= 10:
+            self.animation_counter = 0
+            self.frame_index = (self.frame_index + 1) % 4
\ No newline at end of file
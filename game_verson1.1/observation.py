@@ -0,0 +1,166 @@
+import argparse
+import os
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+from config import *
+
+
+def ensure_display():
+    """Surface.convert()需要一个显示模式；没有窗口时创建一个隐藏的1x1显示"""
+    if pygame.display.get_surface() is None:
+        pygame.display.init()
+        pygame.display.set_mode((1, 1), pygame.HIDDEN)
+
+
+_resources = None
+
+
+def shared_resources():
+    """同一进程内的所有PixelObserver共用一个资源管理器"""
+    global _resources
+    if _resources is None:
+        from assets import AssetManager
+        _resources = AssetManager()
+    return _resources
+
+
+def observation_shape(size=OBS_PIXEL_SIZE, gray=True):
+    """像素观测数组的形状（行, 列[, 通道]）"""
+    width, height = size
+    return (height, width) if gray else (height, width, 3)
+
+
+class PixelObserver:
+    """
+    把GameWorld用WorldRenderer画到可复用的离屏Surface上，再缩小成低分辨率观测
+    observe()返回的是指向Surface像素的NumPy视图（不复制），下一次observe()会覆盖其内容
+    """
+
+    def __init__(self, resources=None, size=OBS_PIXEL_SIZE, gray=True, smooth=True):
+        ensure_display()
+        from render import WorldRenderer
+
+        self.resources = resources or shared_resources()
+        self.size = size
+        self.gray = gray
+        self.smooth = smooth
+        self.canvas = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+        self.small = pygame.Surface(size).convert()
+        # 动画按游戏tick推进而不是墙钟时间，同样的种子和动作总是得到同样的画面
+        self.tick = 0
+        self.renderer = WorldRenderer(self.resources, clock=lambda: self.tick / TICK_RATE)
+        if gray:
+            self.gray_surface = pygame.Surface(size).convert()
+            # 灰度图的三个通道相同，取红色通道的二维视图，转置成(行, 列)
+            self.view = pygame.surfarray.pixels_red(self.gray_surface).T
+        else:
+            self.view = pygame.surfarray.pixels3d(self.small).transpose(1, 0, 2)
+
+    @property
+    def shape(self):
+        return observation_shape(self.size, self.gray)
+
+    def observe(self, world, out=None):
+        """
+        画出当前画面并缩小
+        :param out: 形状为self.shape的uint8数组（例如共享内存批量缓冲区的一格），给出时把观测写进去
+        :return: out，或者像素视图
+        """
+        self.tick = world.tick
+        self.renderer.draw(self.canvas, world)
+        if self.smooth:
+            pygame.transform.smoothscale(self.canvas, self.size, self.small)
+        else:
+            pygame.transform.scale(self.canvas, self.size, self.small)
+        if self.gray:
+            pygame.transform.grayscale(self.small, self.gray_surface)
+        if out is None:
+            return self.view
+        np.copyto(out, self.view)
+        return out
+
+
+class PixelBatch:
+    """
+    n个像素观测组成的批量缓冲区，可以放在共享内存里给其他进程读取
+    batch[i]是第i格的视图，直接作为PixelObserver.observe的out参数
+    """
+
+    def __init__(self, n, size=OBS_PIXEL_SIZE, gray=True, shared=False, name=None):
+        self.shape = (n,) + observation_shape(size, gray)
+        nbytes = int(np.prod(self.shape))
+        self.shm = None
+        if shared or name:
+            self.shm = shared_memory.SharedMemory(name=name, create=name is None, size=nbytes)
+            self.array = np.ndarray(self.shape, dtype=np.uint8, buffer=self.shm.buf)
+        else:
+            self.array = np.zeros(self.shape, dtype=np.uint8)
+
+    @property
+    def name(self):
+        return self.shm.name if self.shm else None
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        return self.array[index]
+
+    def close(self, unlink=False):
+        if self.shm is None:
+            return
+        self.array = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        self.shm = None
+
+
+def check_determinism(steps=20, seed=0):
+    """同样的种子和动作跑两遍战斗，第二遍每步之间等一帧动画的墙钟时间，像素观测应完全相同"""
+    from env import GameEnv
+
+    rollouts = []
+    for delay in (0, ANIMATION_FRAME_MS / 1000):
+        env = GameEnv(pixels={'size': OBS_PIXEL_SIZE, 'gray': False})
+        env.reset(seed)
+        env.world.start_battle()
+        frames = []
+        for _ in range(steps):
+            time.sleep(delay)
+            frames.append(env.step(0)[0])
+        rollouts.append(frames)
+    return all(np.array_equal(a, b) for a, b in zip(*rollouts))
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from engine import patrol_input
+    from env import GameEnv
+
+    assert check_determinism(), "同样的种子和动作得到了不同的战斗画面"
+
+    parser = argparse.ArgumentParser(description="像素观测的每步耗时")
+    parser.add_argument('--steps', type=int, default=500)
+    parser.add_argument('--size', type=int, nargs=2, default=OBS_PIXEL_SIZE)
+    parser.add_argument('--rgb', action='store_true', help="输出RGB而不是灰度")
+    parser.add_argument('--fast-scale', action='store_true', help="最近邻缩放代替平滑缩放")
+    args = parser.parse_args()
+
+    env = GameEnv()
+    env.reset(0)
+    observer = PixelObserver(size=tuple(args.size), gray=not args.rgb, smooth=not args.fast_scale)
+    batch = PixelBatch(1, tuple(args.size), not args.rgb, shared=True)
+    script = patrol_input(args.steps)
+    world = env.world
+    start = time.perf_counter()
+    for _ in range(args.steps):
+        world.update(*script.poll(world.tick))
+        observer.observe(world, batch[0])
+    elapsed = (time.perf_counter() - start) / args.steps * 1000
+    print(f"观测 {observer.shape} {batch[0].dtype}: {elapsed:.3f} ms/步（含逻辑更新）, "
+          f"整屏拷贝为 {SCREEN_WIDTH * SCREEN_HEIGHT * 3} 字节/步，现在为 {batch[0].nbytes} 字节/步")
+    batch.close(unlink=True)
\ No newline at end of file
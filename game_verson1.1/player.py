@@ -1,4 +1,6 @@
 class Player:
+    __slots__ = ('max_hp', 'hp', 'attack', 'defense', 'speed', 'exp', 'level', 'exp_to_level', 'gold')
+
     def __init__(self):
         self.max_hp = 100
         self.hp = 100
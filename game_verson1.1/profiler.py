@@ -0,0 +1,126 @@
+import json
+import time
+from contextlib import nullcontext
+
+import numpy as np
+from config import *
+
+# 主循环中被计时的阶段（按执行顺序）
+PHASES = [
+    'handle_events',
+    'update_game_state',
+    'npc_update',
+    'map_blit',
+    'sprites',
+    'ui',
+    'display_flip',
+]
+
+_NULL_PHASE = nullcontext()
+
+
+class _PhaseTimer:
+    """单个阶段的计时器，退出时把耗时写进当前帧的那一行"""
+
+    __slots__ = ('profiler', 'column', 'name', 'start')
+
+    def __init__(self, profiler, column, name):
+        self.profiler = profiler
+        self.column = column
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        profiler = self.profiler
+        profiler.samples[profiler.row, self.column] += end - self.start
+        if profiler.trace is not None:
+            profiler.trace.append((self.name, self.start, end - self.start))
+        return False
+
+
+class FrameProfiler:
+    """
+    按阶段记录每帧耗时的环形缓冲区
+    关闭时phase()返回一个共享的空上下文，几乎没有开销
+    """
+
+    def __init__(self, phases=PHASES, capacity=PROFILER_FRAMES):
+        self.phases = list(phases)
+        self.capacity = capacity
+        self.samples = np.zeros((capacity, len(self.phases)))
+        self.row = 0
+        self.frames = 0
+        self.enabled = False
+        self.trace = None
+        self._timers = {name: _PhaseTimer(self, i, name) for i, name in enumerate(self.phases)}
+        self._origin = time.perf_counter()
+
+    def phase(self, name):
+        if not self.enabled:
+            return _NULL_PHASE
+        return self._timers[name]
+
+    def next_frame(self):
+        """开始新的一帧"""
+        if not self.enabled:
+            return
+        self.row = self.frames % self.capacity
+        self.samples[self.row] = 0.0
+        self.frames += 1
+
+    def start_trace(self):
+        self.enabled = True
+        self.trace = []
+
+    def percentiles(self, q=(50, 95, 99)):
+        """各阶段最近若干帧耗时的百分位数（毫秒），最后一项是整帧"""
+        count = min(self.frames, self.capacity)
+        if count < 2:
+            return {}
+        # 当前帧还没结束，不计入统计
+        rows = np.delete(self.samples[:count], self.row, axis=0)
+        values = np.percentile(rows * 1000, q, axis=0)
+        totals = np.percentile(rows.sum(axis=1) * 1000, q)
+        result = {name: tuple(values[:, i]) for i, name in enumerate(self.phases)}
+        result['frame'] = tuple(totals)
+        return result
+
+    def write_trace(self, path):
+        """导出Chrome trace / Perfetto可以打开的JSON文件"""
+        events = [
+            {'name': name, 'ph': 'X', 'pid': 1, 'tid': 1,
+             'ts': (start - self._origin) * 1e6, 'dur': duration * 1e6}
+            for name, start, duration in self.trace or ()
+        ]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+class StartupTimer:
+    """记录启动过程各阶段的耗时，mark(name)结束上一阶段并以name命名"""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name, at=None):
+        """at为该阶段结束的perf_counter时刻，默认为现在"""
+        now = time.perf_counter() if at is None else at
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        total = self.last - self.start
+        lines = [f"{name:<16}{seconds * 1000:9.1f} ms{seconds / total:7.0%}" for name, seconds in self.phases]
+        lines.append(f"{'total':<16}{total * 1000:9.1f} ms")
+        return '\n'.join(lines)
+
+
+# 全局性能分析器，主循环各阶段共用
+profiler = FrameProfiler()
\ No newline at end of file
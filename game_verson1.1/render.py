@@ -0,0 +1,175 @@
+import time
+
+import pygame
+from config import *
+from ui import *
+from game_state import GameState
+from map_renderer import TiledMap
+from sprites import Animation
+from profiler import profiler
+
+# 对话框占用的屏幕区域
+DIALOG_RECT = pygame.Rect(50, SCREEN_HEIGHT - 140, SCREEN_WIDTH - 100, 120)
+
+
+class Motion:
+    """一个tick开始前相机、玩家和史莱姆的位置，渲染时在它和当前位置之间插值"""
+
+    __slots__ = ('map_type', 'camera_x', 'camera_y', 'player_x', 'player_y', 'slime_x', 'slime_y')
+
+    def __init__(self, world):
+        n = len(world.slimes)
+        self.map_type = world.map_type
+        self.camera_x, self.camera_y = world.camera_x, world.camera_y
+        self.player_x, self.player_y = world.player_x, world.player_y
+        self.slime_x = world.slimes.x[:n].tolist()
+        self.slime_y = world.slimes.y[:n].tolist()
+
+
+class WorldRenderer:
+    """把GameWorld的状态画到屏幕上，记录上一帧画过精灵的区域用于修补地图"""
+
+    def __init__(self, resources, clock=time.perf_counter):
+        """
+        :param clock: 返回秒数的时钟，用于推进动画
+        （不用pygame.time.get_ticks()：main.py只初始化显示，没有初始化SDL计时器时它一直返回0）
+        """
+        self.resources = resources
+        self.clock = clock
+        self.map_type = None
+        self.map_view = None
+        self.sprite_rects = []
+        self.battle_slime = None
+        self.last_time = clock()
+
+    def draw(self, screen, world, previous=None, alpha=1.0):
+        """
+        :param previous: 最近一个tick开始前的Motion，给出时位置按alpha在它和当前状态之间插值
+        :param alpha: 0~1，见LoopScheduler.alpha
+        """
+        now = self.clock()
+        dt, self.last_time = (now - self.last_time) * 1000, now
+
+        if world.game_state in (GameState.EXPLORING, GameState.DIALOG):
+            self.draw_exploring(screen, world, previous, alpha)
+            return
+
+        # 其他界面会盖住整屏，回到探索模式时需要整屏重画地图，之前记录的修补区域都不需要了
+        if self.map_view is not None:
+            self.map_view.invalidate()
+        self.sprite_rects = []
+        with profiler.phase('ui'):
+            screen.fill(BLACK)
+
+            if world.game_state == GameState.BATTLE:
+                # 绘制战斗界面
+                resources = self.resources
+                if self.battle_slime is None:
+                    self.battle_slime = Animation(resources['battle_slime_animations']['down'])
+                self.battle_slime.update(dt)
+                draw_battle_screen(
+                    screen, world.player, world.current_monster, resources['battle_bg'],
+                    resources['attack_btn'], resources['defend_btn'], resources['flee_btn'],
+                    resources['battle_animations'], world.current_direction, world.current_frame,
+                    resources['battle_slime_animations'], self.battle_slime.index, world.is_monster_attacking,
+                    world.battle_message
+                )
+            elif world.game_state == GameState.LEVEL_UP:
+                draw_level_up_screen(screen, world.player)
+            elif world.game_state == GameState.GAME_OVER:
+                draw_game_over_screen(screen)
+
+    def draw_exploring(self, screen, world, previous=None, alpha=1.0):
+        """绘制探索模式界面"""
+        resources = self.resources
+        if world.map_type != self.map_type:
+            self.map_type = world.map_type
+            self.map_view = TiledMap(resources['maps'][world.map_type])
+
+        # 相机不动时只重画HUD和上一帧精灵下方的图块
+        camera_x, camera_y, player_pos, slime_positions = self.interpolate(world, previous, alpha)
+        with profiler.phase('map_blit'):
+            self.map_view.draw(screen, camera_x, camera_y, dirty_rects=[HUD_RECT] + self.sprite_rects)
+
+        with profiler.phase('sprites'):
+            rects = self.draw_sprites(screen, world, camera_x, camera_y, player_pos, slime_positions)
+
+        # 绘制UI
+        with profiler.phase('ui'):
+            draw_hud(screen, world.player, world.map_type)
+            if world.game_state == GameState.DIALOG:
+                exclamation_img, exclamation_pos = self.exclamation(world)
+                draw_dialog(screen, world.dialog_lines, world.current_dialog, camera_x, camera_y,
+                            exclamation_img, exclamation_pos)
+                rects.append(DIALOG_RECT)
+                rects.append(exclamation_img.get_rect(topleft=(exclamation_pos[0] + camera_x,
+                                                               exclamation_pos[1] + camera_y)))
+
+        self.sprite_rects = rects
+
+    def add_dirty(self, rect):
+        """在地图上方额外画过的区域，下一帧需要修补"""
+        self.sprite_rects.append(rect)
+
+    def exclamation(self, world):
+        """治安官头顶感叹号的图片和地图坐标"""
+        exclamation_img = self.resources['exclamation_img']
+        return exclamation_img, (world.officer_pos[0], world.officer_pos[1] - exclamation_img.get_height())
+
+    def interpolate(self, world, previous, alpha):
+        """返回插值后的(相机x, 相机y, 玩家位置, [史莱姆位置])；换了地图或没有previous时直接用当前状态"""
+        slimes = world.slimes
+        n = len(slimes)
+        x, y = slimes.x[:n].tolist(), slimes.y[:n].tolist()
+        if previous is None or alpha >= 1.0 or previous.map_type != world.map_type or len(previous.slime_x) != n:
+            return world.camera_x, world.camera_y, (world.player_x, world.player_y), list(zip(x, y))
+
+        def lerp(a, b):
+            return a + (b - a) * alpha
+
+        return (round(lerp(previous.camera_x, world.camera_x)), round(lerp(previous.camera_y, world.camera_y)),
+                (round(lerp(previous.player_x, world.player_x)), round(lerp(previous.player_y, world.player_y))),
+                [(lerp(x0, x1), lerp(y0, y1)) for x0, x1, y0, y1 in zip(previous.slime_x, x, previous.slime_y, y)])
+
+    def draw_sprites(self, screen, world, camera_x, camera_y, player_pos, slime_positions):
+        """绘制史莱姆、感叹号和角色，返回画过的屏幕区域"""
+        resources = self.resources
+        rects = []
+        slime_animations = resources['slime_animations']
+        for slime, (x, y) in zip(world.slimes, slime_positions):
+            image = slime_animations[slime.direction][slime.frame_index]
+            rects.append(screen.blit(image, (x + camera_x, y + camera_y)))
+
+        exclamation_img, exclamation_pos = self.exclamation(world)
+        if world.show_exclamation:
+            rects.append(screen.blit(exclamation_img, (exclamation_pos[0] + camera_x,
+                                                       exclamation_pos[1] + camera_y)))
+
+        # 绘制角色（脚底对齐玩家坐标）
+        image = resources['animations'][world.current_direction][world.current_frame]
+        rects.append(screen.blit(image, (player_pos[0] + camera_x - image.get_width() // 2,
+                                         player_pos[1] + camera_y - image.get_height())))
+
+        return rects
+
+
+if __name__ == "__main__":
+    import os
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    from assets import AssetManager, map_sizes
+    from engine import GameWorld
+    from main import init_display
+
+    # 检查：用与main.py相同的初始化方式，战斗界面的史莱姆动画会随时间换帧
+    screen = init_display()
+    world = GameWorld(map_sizes())
+    world.start_battle()
+    renderer = WorldRenderer(AssetManager())
+    seen = set()
+    deadline = time.perf_counter() + ANIMATION_FRAME_MS * 4 / 1000
+    while time.perf_counter() < deadline:
+        renderer.draw(screen, world)
+        seen.add(renderer.battle_slime.index)
+        time.sleep(0.01)
+    assert len(seen) > 1, f"战斗史莱姆动画没有换帧: {sorted(seen)}"
+    print(f"战斗史莱姆动画经过的帧: {sorted(seen)}")
\ No newline at end of file
@@ -0,0 +1,111 @@
+import json
+import os
+import random
+import time
+
+import numpy as np
+import pygame
+from engine import KeyState
+
+RECORDING_VERSION = 1
+
+# 游戏逻辑会读取的按键，每个tick记录其中被按下的
+TRACKED_KEYS = [
+    pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+    pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s,
+]
+
+# 需要保存的事件属性
+EVENT_FIELDS = {
+    pygame.QUIT: (),
+    pygame.KEYDOWN: ('key',),
+    pygame.KEYUP: ('key',),
+    pygame.MOUSEBUTTONDOWN: ('pos', 'button'),
+}
+
+
+def new_seed():
+    return int.from_bytes(os.urandom(4), 'little')
+
+
+class LiveInput:
+    """从pygame读取真实输入"""
+
+    def poll(self, tick):
+        return pygame.key.get_pressed(), pygame.event.get()
+
+
+class RecordingInput:
+    """把另一个输入源的每个tick原样转发，同时记录下来"""
+
+    def __init__(self, source, seed):
+        self.source = source
+        self.seed = seed
+        self.ticks = []
+
+    def poll(self, tick):
+        keys, events = self.source.poll(tick)
+        pressed = [key for key in TRACKED_KEYS if keys[key]]
+        recorded = [[event.type] + [getattr(event, name) for name in EVENT_FIELDS[event.type]]
+                    for event in events if event.type in EVENT_FIELDS]
+        self.ticks.append([pressed, recorded])
+        return keys, events
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'version': RECORDING_VERSION, 'seed': self.seed, 'ticks': self.ticks}, f,
+                      separators=(',', ':'))
+
+
+class ReplayInput:
+    """按tick回放录制的输入，录像结束时发出QUIT事件"""
+
+    def __init__(self, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != RECORDING_VERSION:
+            raise ValueError(f"不支持的录像版本: {data.get('version')}")
+        self.seed = data['seed']
+        self.ticks = data['ticks']
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def poll(self, tick):
+        if tick >= len(self.ticks):
+            return KeyState(), [pygame.event.Event(pygame.QUIT)]
+        pressed, recorded = self.ticks[tick]
+        events = []
+        for event_type, *values in recorded:
+            fields = dict(zip(EVENT_FIELDS[event_type], values))
+            if 'pos' in fields:
+                fields['pos'] = tuple(fields['pos'])
+            events.append(pygame.event.Event(event_type, **fields))
+        return KeyState(pressed), events
+
+
+def seed_session(seed):
+    """播种random模块；遇敌和SlimeSwarm的随机数都由它派生"""
+    random.seed(seed)
+
+
+class FrameTimer:
+    """记录每帧耗时，用于输出回放时的帧时间分布"""
+
+    def __init__(self):
+        self.samples = []
+        self.last = None
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None:
+            self.samples.append(now - self.last)
+        self.last = now
+
+    def report(self):
+        if not self.samples:
+            return "没有记录到帧"
+        ms = np.array(self.samples) * 1000
+        p50, p95, p99 = np.percentile(ms, (50, 95, 99))
+        return (f"{len(ms)}帧, 平均 {ms.mean():.2f} ms ({1000 / ms.mean():.0f} FPS), "
+                f"p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, 最大 {ms.max():.2f} ms")
\ No newline at end of file
@@ -0,0 +1,179 @@
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+from config import *
+from game_state import GameState
+from swarm import SlimeSwarm, FIELDS, DIRECTIONS
+
+# 存档格式：文件头 + 玩家 + 世界 + 随机数状态 + 史莱姆数组
+SAVE_MAGIC = b'PGSV'
+SAVE_VERSION = 1
+SAVE_HEADER = struct.Struct('<4sHI')  # 魔数, 版本, 正文的CRC32
+
+PLAYER_FIELDS = ('max_hp', 'hp', 'attack', 'defense', 'speed', 'exp', 'level', 'exp_to_level', 'gold')
+PLAYER_STRUCT = struct.Struct('<9i')
+
+# 地图编号, 玩家x, 玩家y, 朝向, 动画帧, 动画计数, 距上次战斗的步数, 史莱姆数量
+WORLD_STRUCT = struct.Struct('<BiiBBHII')
+MAP_NAMES = list(MAP_FILES)
+
+# GameWorld.rng（梅森旋转）的状态：624个字 + 位置
+RANDOM_STRUCT = struct.Struct('<625I')
+
+# 史莱姆随机数生成器（PCG64）的状态：state和inc各128位, has_uint32, uinteger
+SWARM_RNG_STRUCT = struct.Struct('<16s16sBI')
+
+
+def _pack_u128(value):
+    return value.to_bytes(16, 'little')
+
+
+def _unpack_u128(data):
+    return int.from_bytes(data, 'little')
+
+
+def snapshot(world):
+    """
+    把探索状态下的GameWorld打包成bytes
+    bytes不可变，之后世界再怎么变化也不影响这份快照，可以直接交给后台线程写盘
+    """
+    if world.game_state != GameState.EXPLORING:
+        raise ValueError(f"只能在探索状态下存档: {world.game_state.name}")
+    player = world.player
+    slimes = world.slimes
+    n = len(slimes)
+    rng_state = slimes.rng.bit_generator.state
+
+    parts = [
+        PLAYER_STRUCT.pack(*(getattr(player, name) for name in PLAYER_FIELDS)),
+        WORLD_STRUCT.pack(MAP_NAMES.index(world.map_type), world.player_x, world.player_y,
+                          DIRECTIONS.index(world.current_direction), world.current_frame,
+                          world.animation_counter, world.steps_since_last_battle, n),
+        RANDOM_STRUCT.pack(*world.rng.getstate()[1]),
+        SWARM_RNG_STRUCT.pack(_pack_u128(rng_state['state']['state']), _pack_u128(rng_state['state']['inc']),
+                              rng_state['has_uint32'], rng_state['uinteger']),
+    ]
+    parts.extend(getattr(slimes, name)[:n].tobytes() for name, _ in FIELDS)
+    body = b''.join(parts)
+    return SAVE_HEADER.pack(SAVE_MAGIC, SAVE_VERSION, zlib.crc32(body)) + body
+
+
+def restore(world, data):
+    """把snapshot()的结果恢复到GameWorld，格式不对时抛出ValueError"""
+    data = memoryview(data)
+    magic, version, crc = SAVE_HEADER.unpack_from(data)
+    if magic != SAVE_MAGIC or version != SAVE_VERSION:
+        raise ValueError(f"不支持的存档格式: {bytes(magic)!r} v{version}")
+    body = data[SAVE_HEADER.size:]
+    if zlib.crc32(body) != crc:
+        raise ValueError("存档校验失败")
+
+    offset = 0
+    player_values = PLAYER_STRUCT.unpack_from(body, offset)
+    offset += PLAYER_STRUCT.size
+    (map_index, player_x, player_y, direction, frame, animation_counter,
+     steps, count) = WORLD_STRUCT.unpack_from(body, offset)
+    offset += WORLD_STRUCT.size
+    random_state = RANDOM_STRUCT.unpack_from(body, offset)
+    offset += RANDOM_STRUCT.size
+    rng_state, rng_inc, has_uint32, uinteger = SWARM_RNG_STRUCT.unpack_from(body, offset)
+    offset += SWARM_RNG_STRUCT.size
+
+    world.reset()
+    for name, value in zip(PLAYER_FIELDS, player_values):
+        setattr(world.player, name, value)
+    world.current_direction = DIRECTIONS[direction]
+    world.current_frame = frame
+    world.animation_counter = animation_counter
+    world.steps_since_last_battle = steps
+    world.enter_map(MAP_NAMES[map_index], (player_x, player_y))
+
+    slimes = SlimeSwarm(capacity=max(16, count), seed=0)
+    for name, dtype in FIELDS:
+        size = np.dtype(dtype).itemsize * count
+        getattr(slimes, name)[:count] = np.frombuffer(body, dtype=dtype, count=count, offset=offset)
+        offset += size
+    slimes.count = count
+    slimes.rng.bit_generator.state = {
+        'bit_generator': 'PCG64',
+        'state': {'state': _unpack_u128(rng_state), 'inc': _unpack_u128(rng_inc)},
+        'has_uint32': has_uint32,
+        'uinteger': uinteger,
+    }
+    world.slimes = slimes
+    world.build_spatial_index()
+    world.rng.setstate((3, random_state, None))
+
+
+def write_snapshot(path, data):
+    """原子写入：先写临时文件再替换，写到一半崩溃也不会损坏旧存档"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """读取存档文件，不存在时返回None"""
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+class AutoSaver:
+    """
+    定时自动存档
+    主线程只负责打包快照，写盘在后台线程进行；写盘跟不上时只保留最新的一份快照
+    """
+
+    def __init__(self, path=SAVE_FILE, interval=AUTOSAVE_TICKS):
+        self.path = path
+        self.interval = interval
+        self.last_tick = 0
+        self.saves = 0
+        self._lock = threading.Lock()
+        self._pending = None
+        self._thread = None
+
+    def update(self, world):
+        """每帧调用，到时间且处于探索状态时存档"""
+        if world.tick - self.last_tick >= self.interval and world.game_state == GameState.EXPLORING:
+            self.save(world)
+
+    def save(self, world):
+        data = snapshot(world)
+        world.checkpoint = data
+        self.last_tick = world.tick
+        with self._lock:
+            self._pending = data
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._write_pending, daemon=True)
+                self._thread.start()
+        return data
+
+    def _write_pending(self):
+        while True:
+            with self._lock:
+                data, self._pending = self._pending, None
+                if data is None:
+                    self._thread = None
+                    return
+            try:
+                write_snapshot(self.path, data)
+                self.saves += 1
+            except OSError as e:
+                print(f"自动存档失败: {e}")
+
+    def flush(self):
+        """等待后台写盘完成（退出游戏前调用）"""
+        with self._lock:
+            thread = self._thread
+        if thread is not None:
+            thread.join()
\ No newline at end of file
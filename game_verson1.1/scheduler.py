@@ -0,0 +1,79 @@
+import time
+
+from config import *
+
+
+class LoopScheduler:
+    """
+    主循环调度：逻辑按固定的tick_rate推进，渲染尽力而为
+    每帧先补齐到期的逻辑tick，来不及时跳过渲染（从不跳过逻辑tick），并统计跳过的帧数
+    """
+
+    def __init__(self, tick_rate=TICK_RATE, max_fps=FPS, max_skip=MAX_RENDER_SKIP,
+                 max_catchup=MAX_CATCHUP_SECONDS, clock=time.perf_counter, sleep=time.sleep):
+        self.tick_time = 1.0 / tick_rate
+        self.frame_time = 1.0 / max_fps if max_fps else 0.0
+        self.max_skip = max_skip
+        self.max_catchup = max_catchup
+        self.clock = clock
+        self.sleep = sleep
+        self.accumulator = 0.0
+        self.last = None
+        self.last_render = None
+        self.skipped_in_row = 0
+        self.ticks = 0
+        self.rendered = 0
+        self.dropped = 0
+        self.stalls = 0
+
+    def ticks_due(self):
+        """开始新的一帧，返回这一帧需要推进的逻辑tick数"""
+        now = self.clock()
+        if self.last is None:
+            self.last = now
+            self.ticks += 1
+            return 1
+        self.accumulator += now - self.last
+        self.last = now
+        if self.accumulator > self.max_catchup:
+            # 被挂起或断点暂停了很久，不追赶这段时间
+            self.accumulator = self.max_catchup
+            self.stalls += 1
+        count = int(self.accumulator / self.tick_time)
+        self.accumulator -= count * self.tick_time
+        self.ticks += count
+        return count
+
+    @property
+    def alpha(self):
+        """当前时刻在上一个tick和下一个tick之间的位置（0~1），用于插值"""
+        return min(1.0, self.accumulator / self.tick_time)
+
+    def should_render(self):
+        """
+        推进完逻辑后是否渲染这一帧
+        推进逻辑期间又到了下一个tick说明机器跟不上，跳过渲染，但最多连续跳过max_skip帧
+        """
+        behind = self.accumulator + (self.clock() - self.last) >= self.tick_time
+        if behind and self.skipped_in_row < self.max_skip:
+            self.skipped_in_row += 1
+            self.dropped += 1
+            return False
+        self.skipped_in_row = 0
+        self.rendered += 1
+        return True
+
+    def wait(self):
+        """渲染后等待，使渲染帧率不超过max_fps（为0时不等待）"""
+        if not self.frame_time:
+            return
+        now = self.clock()
+        target = (self.last_render or now) + self.frame_time
+        self.last_render = max(now, target)
+        if target > now:
+            self.sleep(target - now)
+
+    def report(self):
+        total = self.rendered + self.dropped
+        return (f"逻辑 {self.ticks} tick, 渲染 {self.rendered} 帧, 跳过 {self.dropped} 帧"
+                f" ({self.dropped / max(1, total):.1%})" + (f", 长时间停顿 {self.stalls} 次" if self.stalls else ""))
\ No newline at end of file
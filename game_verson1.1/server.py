@@ -0,0 +1,481 @@
+import argparse
+import os
+import random
+import socket
+import statistics
+import sys
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+import pygame
+from config import *
+from assets import map_sizes
+from engine import GameWorld, KeyState
+from game_state import GameState
+from monster import SPECIES, monster_pool
+from navigation import FlowField, walk_grid
+from netsync import (MSG_HELLO, MSG_INPUT, MSG_WELCOME, MSG_SNAPSHOT, MSG_BYE, HELLO, BYE, WELCOME, INPUT,
+                     HELD_KEYS, PRESS_KEYS, KIND_PLAYER, KIND_SLIME, KIND_MONSTER, SLIME_ID_BASE, SLIMES_PER_MAP,
+                     MONSTER_ID_BASE, MAX_PLAYERS, FIELD_INDEX, ALL_FIELDS, ENTITY_HEADER, SNAPSHOT_HEADER,
+                     field_struct, quantize, key_bits, bits_keys, encode_snapshot, decode_snapshot)
+from spatial import SpatialHash, PointGrid
+from swarm import SlimeSwarm, DIRECTIONS
+
+MAP_NAMES = list(MAP_FILES)
+SPECIES_LEVEL = {species: level for level, species in SPECIES.items()}
+# 每个UDP包在IPv4上的额外开销（IP头20字节 + UDP头8字节）
+UDP_OVERHEAD = 28
+FULL_ENTITY_SIZE = ENTITY_HEADER.size + field_struct(ALL_FIELDS).size
+
+
+class MapInstance:
+    """一张地图上所有玩家共享的史莱姆，以及用于兴趣裁剪的空间哈希（史莱姆和玩家）"""
+
+    def __init__(self, map_type, seed):
+        self.map_type = map_type
+        self.index = MAP_NAMES.index(map_type)
+        self.walk = walk_grid(map_type)
+        spawns = SLIME_SPAWNS.get(map_type, [])
+        if len(spawns) > SLIMES_PER_MAP:
+            raise ValueError(f"{map_type}的史莱姆数量 {len(spawns)} 超过了快照编号段 {SLIMES_PER_MAP}")
+        self.slimes = SlimeSwarm.from_positions(spawns, seed=seed)
+        self.flow = FlowField(self.walk, SLIME_CHASE_CELLS) if self.walk and len(self.slimes) else None
+        # 玩家登记在空间哈希里，史莱姆用PointGrid批量索引
+        self.spatial = SpatialHash()
+        self.slime_index = PointGrid()
+        self.slime_index.update(self.slimes.x[:len(self.slimes)], self.slimes.y[:len(self.slimes)])
+        self.players = set()
+        self.slime_records = []
+
+    def update(self, targets):
+        """史莱姆追向地图上最近的玩家（流场以所有玩家为目标）；没有玩家的地图不更新"""
+        flow = None
+        if self.flow is not None and targets:
+            self.flow.update(targets)
+            flow = self.flow
+        self.slimes.update(self.walk, flow)
+        n = len(self.slimes)
+        self.slime_index.update(self.slimes.x[:n], self.slimes.y[:n])
+
+    def build_records(self):
+        """所有史莱姆的量化状态，同一次快照里所有客户端共用"""
+        n = len(self.slimes)
+        slimes = self.slimes
+        xs = np.clip(np.rint(slimes.x[:n] * POSITION_SCALE), 0, 0xffff).astype(np.int64).tolist()
+        ys = np.clip(np.rint(slimes.y[:n] * POSITION_SCALE), 0, 0xffff).astype(np.int64).tolist()
+        self.slime_records = [
+            (KIND_SLIME, self.index, x, y, direction, frame, state, 0, 0, 0, 0, 0)
+            for x, y, direction, frame, state in zip(xs, ys, slimes.direction[:n].tolist(),
+                                                     slimes.frame_index[:n].tolist(), slimes.state[:n].tolist())
+        ]
+
+
+def player_record(world, own):
+    """玩家的量化状态；经验和金币只发给玩家自己"""
+    player = world.player
+    return (KIND_PLAYER, MAP_NAMES.index(world.map_type), quantize(world.player_x), quantize(world.player_y),
+            DIRECTIONS.index(world.current_direction), world.current_frame, world.game_state.value,
+            max(0, player.hp), player.max_hp, player.level,
+            min(0xffff, player.exp) if own else 0, player.gold if own else 0)
+
+
+def monster_record(world):
+    monster = world.current_monster
+    return (KIND_MONSTER, MAP_NAMES.index(world.map_type), 0, 0, 0, 0, 0,
+            max(0, monster.hp), monster.max_hp, SPECIES_LEVEL.get(monster.species, 0), 0, 0)
+
+
+class ClientSession:
+    """服务器上一个已连接客户端的状态"""
+
+    def __init__(self, player_id, address, world, tick):
+        self.player_id = player_id
+        self.address = address
+        self.world = world
+        self.map_type = world.map_type
+        self.keys = KeyState()
+        self.events = []
+        self.sequence = 0
+        self.last_input = tick
+        # 客户端确认收到的最新快照tick，下一个快照以它为基准做增量
+        self.last_ack = 0
+        self.history = OrderedDict()
+        self.bytes_sent = 0
+        self.full_bytes = 0
+        self.packets_sent = 0
+
+
+class SimulationServer:
+    """
+    权威的多人模拟服务器：所有玩家的GameWorld、共享的史莱姆都在这里推进
+    客户端只发送按键，服务器每SNAPSHOT_INTERVAL个tick向每个客户端发送一次兴趣范围内实体的增量快照
+    """
+
+    def __init__(self, host='127.0.0.1', port=SERVER_PORT, seed=0, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+        self.rng = random.Random(seed)
+        self.snapshot_interval = snapshot_interval
+        self.sizes = map_sizes()
+        self.maps = {}
+        self.sessions = {}
+        self.players = {}
+        # 可用的玩家编号，断开的编号放回队尾，尽量晚地被复用
+        self.free_ids = deque(range(1, MAX_PLAYERS + 1))
+        self.tick = 0
+        self.tick_times = []
+
+    def instance(self, map_type):
+        instance = self.maps.get(map_type)
+        if instance is None:
+            instance = self.maps[map_type] = MapInstance(map_type, self.rng.getrandbits(64))
+        return instance
+
+    def slimes_for(self, map_type):
+        return self.instance(map_type).slimes
+
+    def connect(self, address):
+        """为新客户端创建会话；玩家编号用完时返回None"""
+        if not self.free_ids:
+            return None
+        player_id = self.free_ids.popleft()
+        world = GameWorld(self.sizes, walk_grid=walk_grid, rng=random.Random(self.rng.getrandbits(64)),
+                          shared_slimes=self.slimes_for)
+        session = ClientSession(player_id, address, world, self.tick)
+        self.sessions[address] = session
+        self.players[player_id] = session
+        instance = self.instance(world.map_type)
+        instance.spatial.insert(('player', player_id), world.player_x, world.player_y)
+        instance.players.add(player_id)
+        return session
+
+    def disconnect(self, session):
+        instance = self.maps[session.map_type]
+        instance.spatial.remove(('player', session.player_id))
+        instance.players.discard(session.player_id)
+        if session.world.current_monster is not None:
+            monster_pool.release(session.world.current_monster)
+        del self.sessions[session.address]
+        del self.players[session.player_id]
+        self.free_ids.append(session.player_id)
+
+    def receive(self):
+        """处理所有已到达的数据包"""
+        while True:
+            try:
+                data, address = self.socket.recvfrom(2048)
+            except (BlockingIOError, ConnectionResetError):
+                return
+            if not data:
+                continue
+            session = self.sessions.get(address)
+            if data[0] == MSG_HELLO:
+                if session is None:
+                    session = self.connect(address)
+                    if session is None:
+                        continue  # 服务器已满，不回复，客户端停留在未连接状态
+                self.socket.sendto(WELCOME.pack(MSG_WELCOME, session.player_id), address)
+            elif session is None:
+                continue
+            elif data[0] == MSG_INPUT and len(data) == INPUT.size:
+                _, sequence, ack, held, pressed = INPUT.unpack(data)
+                if sequence <= session.sequence:
+                    continue  # 乱序到达的旧输入
+                session.sequence = sequence
+                session.last_input = self.tick
+                session.keys = KeyState(bits_keys(held, HELD_KEYS))
+                session.events.extend(pygame.event.Event(pygame.KEYDOWN, key=key)
+                                      for key in bits_keys(pressed, PRESS_KEYS))
+                if ack > session.last_ack and ack in session.history:
+                    session.last_ack = ack
+            elif data[0] == MSG_BYE:
+                self.disconnect(session)
+
+    def track(self, session):
+        """把玩家的新位置（可能换了地图）登记到兴趣裁剪用的空间哈希"""
+        world = session.world
+        entity = ('player', session.player_id)
+        if world.map_type != session.map_type:
+            old = self.maps[session.map_type]
+            old.spatial.remove(entity)
+            old.players.discard(session.player_id)
+            session.map_type = world.map_type
+            instance = self.instance(world.map_type)
+            instance.spatial.insert(entity, world.player_x, world.player_y)
+            instance.players.add(session.player_id)
+        else:
+            self.maps[session.map_type].spatial.move(entity, world.player_x, world.player_y)
+
+    def step(self):
+        """推进一个tick：收输入、更新所有玩家和地图，按间隔发送快照"""
+        start = time.perf_counter()
+        self.tick += 1
+        self.receive()
+        for session in list(self.players.values()):
+            if self.tick - session.last_input > CLIENT_TIMEOUT:
+                self.disconnect(session)
+                continue
+            session.world.update(session.keys, session.events)
+            session.events = []
+            self.track(session)
+
+        for instance in self.maps.values():
+            if instance.players:
+                worlds = [self.players[player_id].world for player_id in instance.players]
+                instance.update([(world.player_x, world.player_y) for world in worlds
+                                 if world.game_state == GameState.EXPLORING])
+
+        # 客户端按编号错开发送快照的tick，每个tick的编码和发送量大致相同
+        due = [session for player_id, session in self.players.items()
+               if (self.tick + player_id) % self.snapshot_interval == 0]
+        if due:
+            self.send_snapshots(due)
+        self.tick_times.append(time.perf_counter() - start)
+
+    def build_snapshot(self, session, public):
+        """session能看到的实体：兴趣范围内的史莱姆和其他玩家、自己，以及自己正在战斗的怪物"""
+        world = session.world
+        instance = self.maps[world.map_type]
+        half_width = SCREEN_WIDTH // 2 + INTEREST_MARGIN
+        half_height = SCREEN_HEIGHT // 2 + INTEREST_MARGIN
+        rect = (world.player_x - half_width, world.player_y - half_height, half_width * 2, half_height * 2)
+        snapshot = {}
+        slime_base = SLIME_ID_BASE + instance.index * SLIMES_PER_MAP
+        records = instance.slime_records
+        for index in instance.slime_index.query_rect(rect).tolist():
+            snapshot[slime_base + index] = records[index]
+        for _, player_id in instance.spatial.query_rect(rect):
+            snapshot[player_id] = public[player_id]
+        snapshot[session.player_id] = player_record(world, own=True)
+        if world.current_monster is not None:
+            snapshot[MONSTER_ID_BASE + session.player_id] = monster_record(world)
+        return snapshot
+
+    def send_snapshots(self, sessions):
+        public = {player_id: player_record(session.world, own=False) for player_id, session in self.players.items()}
+        for instance in self.maps.values():
+            if instance.players:
+                instance.build_records()
+
+        for session in sessions:
+            snapshot = self.build_snapshot(session, public)
+            baseline = session.history.get(session.last_ack)
+            data = encode_snapshot(self.tick, snapshot, session.last_ack, baseline)
+            try:
+                self.socket.sendto(data, session.address)
+            except (BlockingIOError, ConnectionRefusedError):
+                pass  # 和丢包一样处理：客户端没有确认，下次仍以旧基准做增量
+            session.bytes_sent += len(data)
+            session.full_bytes += SNAPSHOT_HEADER.size + len(snapshot) * FULL_ENTITY_SIZE
+            session.packets_sent += 1
+
+            # 确认只会前进，比已确认更早的快照不会再做基准
+            session.history[self.tick] = snapshot
+            while session.history and (next(iter(session.history)) < session.last_ack
+                                       or len(session.history) > SNAPSHOT_HISTORY):
+                session.history.popitem(last=False)
+
+    def serve_forever(self):
+        """按TICK_RATE实时运行，直到Ctrl+C"""
+        print(f"服务器运行在 {self.address[0]}:{self.address[1]}")
+        tick_time = 1.0 / TICK_RATE
+        next_tick = time.perf_counter()
+        try:
+            while True:
+                self.step()
+                next_tick += tick_time
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_tick = time.perf_counter()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.socket.close()
+
+
+class SyncClient:
+    """
+    最简单的客户端：发送按键，接收并解码快照，确认收到的最新快照
+    :param drop: 模拟丢包，按这个比例丢弃收到的快照
+    """
+
+    def __init__(self, address, drop=0.0, rng=None):
+        self.address = address
+        self.drop = drop
+        self.rng = rng or random.Random()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.setblocking(False)
+        self.player_id = None
+        self.sequence = 0
+        self.tick = 0
+        self.snapshot = {}
+        self.baselines = OrderedDict()
+        self.bytes_received = 0
+
+    def hello(self):
+        self.socket.sendto(HELLO.pack(MSG_HELLO), self.address)
+
+    def send_input(self, held=(), pressed=()):
+        self.sequence += 1
+        self.socket.sendto(INPUT.pack(MSG_INPUT, self.sequence, self.tick, key_bits(held, HELD_KEYS),
+                                      key_bits(pressed, PRESS_KEYS)), self.address)
+
+    def receive(self):
+        while True:
+            try:
+                data = self.socket.recv(65536)
+            except (BlockingIOError, ConnectionRefusedError):
+                return
+            self.bytes_received += len(data)
+            if data[0] == MSG_WELCOME:
+                self.player_id = WELCOME.unpack(data)[1]
+            elif data[0] == MSG_SNAPSHOT:
+                if self.drop and self.rng.random() < self.drop:
+                    continue
+                if SNAPSHOT_HEADER.unpack_from(data)[1] <= self.tick:
+                    continue  # 乱序到达的旧快照
+                try:
+                    tick, snapshot = decode_snapshot(data, self.baselines)
+                except KeyError:
+                    continue  # 基准已经丢弃，等服务器按新的确认重发
+                self.tick, self.snapshot = tick, snapshot
+                self.baselines[tick] = snapshot
+                while len(self.baselines) > SNAPSHOT_HISTORY:
+                    self.baselines.popitem(last=False)
+
+    @property
+    def me(self):
+        return self.snapshot.get(self.player_id)
+
+    def close(self):
+        if self.player_id is not None:
+            self.socket.sendto(BYE.pack(MSG_BYE, self.player_id), self.address)
+        self.socket.close()
+
+
+class Bot:
+    """负载测试用的机器人：随机走动，战斗中攻击，按状态按空格或R"""
+
+    MOVE_KEYS = [pygame.K_UP, pygame.K_DOWN, pygame.K_LEFT, pygame.K_RIGHT]
+
+    def __init__(self, client, rng):
+        self.client = client
+        self.rng = rng
+        self.held = ()
+        self.next_turn = 0
+        self.ticks = 0
+
+    def act(self):
+        self.ticks += 1
+        if self.ticks >= self.next_turn:
+            self.held = (self.rng.choice(self.MOVE_KEYS),)
+            self.next_turn = self.ticks + self.rng.randint(60, 180)
+        pressed = ()
+        me = self.client.me
+        if me is not None and self.ticks % 10 == 0:
+            state = GameState(me[FIELD_INDEX['state']])
+            if state == GameState.BATTLE:
+                pressed = (pygame.K_1,)
+            elif state in (GameState.DIALOG, GameState.LEVEL_UP):
+                pressed = (pygame.K_SPACE,)
+            elif state == GameState.GAME_OVER:
+                pressed = (pygame.K_r,)
+        self.client.send_input(self.held, pressed)
+
+
+def load_test(clients, ticks, seed=0, drop=0.0):
+    """
+    在同一进程里用回环UDP跑一个服务器和clients个机器人客户端
+    每个tick检查客户端解码出的快照与服务器为它裁剪的快照相同（在服务器计时之外）
+    :param drop: 客户端丢弃快照的比例，检查丢包时增量同步仍然正确
+    :return: 服务器每tick耗时、每个客户端带宽和快照检查的统计
+    """
+    server = SimulationServer(port=0, seed=seed)
+    rng = random.Random(seed)
+    bots = [Bot(SyncClient(server.address, drop, random.Random(rng.getrandbits(64))),
+                random.Random(rng.getrandbits(64))) for _ in range(clients)]
+    for bot in bots:
+        bot.client.hello()
+    server.receive()
+    for bot in bots:
+        bot.client.receive()
+    server.tick_times.clear()
+
+    checked = mismatches = 0
+    for _ in range(ticks):
+        for bot in bots:
+            bot.act()
+        server.step()
+        for bot in bots:
+            client = bot.client
+            client.receive()
+            expected = server.players[client.player_id].history.get(client.tick)
+            if expected is not None:
+                checked += 1
+                mismatches += client.snapshot != expected
+
+    seconds = ticks / TICK_RATE
+    sessions = list(server.players.values())
+    payload = sum(session.bytes_sent for session in sessions)
+    packets = sum(session.packets_sent for session in sessions)
+    full = sum(session.full_bytes for session in sessions)
+    times = sorted(server.tick_times)
+    result = {
+        'clients': clients,
+        'connected': len(sessions),
+        'tick_ms': statistics.mean(times) * 1000,
+        'p99_ms': times[int(len(times) * 0.99)] * 1000,
+        'down_kbps': payload / clients / seconds / 1024,
+        'wire_kbps': (payload + packets * UDP_OVERHEAD) / clients / seconds / 1024,
+        'up_kbps': (INPUT.size + UDP_OVERHEAD) * TICK_RATE / 1024,
+        'delta_ratio': payload / max(1, full),
+        'received': sum(bot.client.bytes_received for bot in bots),
+        'checked': checked,
+        'mismatches': mismatches,
+    }
+    for bot in bots:
+        bot.client.close()
+    server.socket.close()
+    return result
+
+
+if __name__ == "__main__":
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+    parser = argparse.ArgumentParser(description="多人模拟服务器")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve', help="按实时速度运行服务器")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=SERVER_PORT)
+    serve.add_argument('--seed', type=int, default=0)
+    load = sub.add_parser('loadtest', help="回环负载测试：服务器tick耗时和每个客户端的带宽")
+    load.add_argument('--clients', type=int, nargs='+', default=[1, 8, 32, 64, 128])
+    load.add_argument('--ticks', type=int, default=600)
+    load.add_argument('--seed', type=int, default=0)
+    load.add_argument('--drop', type=float, default=0.0, help="客户端丢弃快照的比例（模拟丢包）")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        SimulationServer(args.host, args.port, args.seed).serve_forever()
+    else:
+        budget = 1000 / TICK_RATE
+        print(f"{'客户端':>6}{'tick均值ms':>12}{'p99 ms':>9}{'下行KB/s':>10}{'含包头KB/s':>12}{'增量/完整':>10}"
+              f"{'快照不一致':>8}")
+        fits = None
+        failed = False
+        for count in args.clients:
+            r = load_test(count, args.ticks, args.seed, args.drop)
+            print(f"{r['clients']:>8}{r['tick_ms']:>14.3f}{r['p99_ms']:>10.3f}{r['down_kbps']:>11.2f}"
+                  f"{r['wire_kbps']:>13.2f}{r['delta_ratio']:>12.1%}{r['mismatches']:>8}/{r['checked']}")
+            failed = failed or r['mismatches'] > 0 or not r['checked']
+            if r['p99_ms'] <= budget:
+                fits = count if fits is None else max(fits, count)
+        print(f"上行（每个客户端）: {r['up_kbps']:.2f} KB/s；单核{TICK_RATE}tick/s预算 {budget:.1f} ms，"
+              + (f"p99在预算内的最大测试规模为 {fits} 个客户端" if fits else "没有一个测试规模的p99在预算内"))
+        if failed:
+            sys.exit("客户端解码的快照与服务器不一致")
\ No newline at end of file
@@ -0,0 +1,175 @@
+import numpy as np
+import pygame
+from config import *
+
+
+class SpatialHash:
+    """
+    均匀网格空间哈希：实体按覆盖到的格子登记，查询只检查附近格子里的实体
+    实体可以是任意可哈希对象，每个实体带一个半径（触发范围）
+    """
+
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = {}  # 实体 -> [x, y, 半径, 覆盖的格子]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, entity):
+        return entity in self.entries
+
+    def _cells_for(self, x, y, radius):
+        size = self.cell_size
+        left, right = int((x - radius) // size), int((x + radius) // size)
+        top, bottom = int((y - radius) // size), int((y + radius) // size)
+        if left == right and top == bottom:
+            return ((left, top),)
+        return tuple((cx, cy) for cx in range(left, right + 1) for cy in range(top, bottom + 1))
+
+    def insert(self, entity, x, y, radius=0):
+        if entity in self.entries:
+            self.remove(entity)
+        cells = self._cells_for(x, y, radius)
+        for cell in cells:
+            self.cells.setdefault(cell, set()).add(entity)
+        self.entries[entity] = [x, y, radius, cells]
+
+    def remove(self, entity):
+        entry = self.entries.pop(entity)
+        for cell in entry[3]:
+            bucket = self.cells[cell]
+            bucket.discard(entity)
+            if not bucket:
+                del self.cells[cell]
+
+    def move(self, entity, x, y):
+        """更新实体位置，没有跨格子时不改动格子登记"""
+        entry = self.entries[entity]
+        cells = self._cells_for(x, y, entry[2])
+        if cells != entry[3]:
+            for cell in entry[3]:
+                bucket = self.cells[cell]
+                bucket.discard(entity)
+                if not bucket:
+                    del self.cells[cell]
+            for cell in cells:
+                self.cells.setdefault(cell, set()).add(entity)
+            entry[3] = cells
+        entry[0] = x
+        entry[1] = y
+
+    def position(self, entity):
+        entry = self.entries[entity]
+        return entry[0], entry[1]
+
+    def _candidates(self, left, top, right, bottom):
+        size = self.cell_size
+        found = set()
+        for cx in range(int(left // size), int(right // size) + 1):
+            for cy in range(int(top // size), int(bottom // size) + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    found.update(bucket)
+        return found
+
+    def query_radius(self, x, y, radius):
+        """返回触发范围与以(x, y)为圆心、radius为半径的圆相交的实体"""
+        result = []
+        for entity in self._candidates(x - radius, y - radius, x + radius, y + radius):
+            ex, ey, entity_radius, _ = self.entries[entity]
+            reach = radius + entity_radius
+            if (ex - x) ** 2 + (ey - y) ** 2 < reach * reach:
+                result.append(entity)
+        return result
+
+    def query_rect(self, rect):
+        """返回位置落在矩形内的实体"""
+        rect = pygame.Rect(rect)
+        result = []
+        for entity in self._candidates(rect.left, rect.top, rect.right, rect.bottom):
+            ex, ey = self.entries[entity][:2]
+            if rect.left <= ex < rect.right and rect.top <= ey < rect.bottom:
+                result.append(entity)
+        return result
+
+
+class PointGrid:
+    """
+    大量点实体（如SlimeSwarm里的史莱姆）的网格索引，实体就是位置数组的下标
+    不为每个实体维护Python对象：格子编号用NumPy批量计算，下标按格子排序，查询时二分查找附近格子
+    update()只记下位置数组，到下一次查询时才重新计算，没有查询时没有开销
+    """
+
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.xs = np.empty(0, dtype=np.float32)
+        self.ys = np.empty(0, dtype=np.float32)
+        self.keys = np.empty(0, dtype=np.int64)
+        self.order = np.empty(0, dtype=np.intp)
+        self.sorted_keys = self.keys
+        self.dirty = False
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _cells(self, values):
+        # 乘倒数比浮点整除快得多；查询矩形的边界按位置数组的类型用同样的算式，保证格子一致
+        values = np.asarray(values, dtype=self.xs.dtype)
+        return np.floor(values * values.dtype.type(1.0 / self.cell_size)).astype(np.int64)
+
+    def _cell_keys(self, cx, cy):
+        # 格子坐标偏移到非负后拼成一个int64
+        return ((cx + (1 << 31)) << 32) | (cy + (1 << 31))
+
+    def update(self, xs, ys):
+        """
+        位置数组改变后调用
+        :param xs, ys: 所有实体的位置数组（例如SlimeSwarm.x[:n]），只保存引用不复制
+        """
+        self.xs, self.ys = xs, ys
+        self.dirty = True
+
+    def _refresh(self):
+        self.dirty = False
+        xs, ys = self.xs, self.ys
+        keys = self._cell_keys(self._cells(xs), self._cells(ys))
+        if len(keys) == len(self.keys):
+            moved = keys != self.keys
+            changed = np.flatnonzero(moved)
+            if not len(changed):
+                return  # 没有实体跨格子
+            # 只重新登记跨了格子的实体：从有序数组中去掉它们，再按新格子插回去
+            keep = self.order[~moved[self.order]]
+            changed = changed[np.argsort(keys[changed], kind='stable')]
+            self.order = np.insert(keep, np.searchsorted(keys[keep], keys[changed], 'right'), changed)
+        else:
+            self.order = np.argsort(keys, kind='stable')
+        self.keys = keys
+        self.sorted_keys = keys[self.order]
+
+    def query_rect(self, rect):
+        """返回位置落在矩形内的实体下标（NumPy数组）"""
+        left, top, width, height = rect
+        right, bottom = left + width, top + height
+        (cell_left, cell_right), (cell_top, cell_bottom) = self._cells((left, right)), self._cells((top, bottom))
+        if len(self.xs) <= POINT_GRID_SCAN * (cell_right - cell_left + 1) * (cell_bottom - cell_top + 1):
+            # 实体比要查的格子少得多时，直接检查全部实体更快
+            xs, ys = self.xs, self.ys
+            return np.flatnonzero((xs >= left) & (xs < right) & (ys >= top) & (ys < bottom))
+        if self.dirty:
+            self._refresh()
+        cx, cy = np.meshgrid(np.arange(cell_left, cell_right + 1, dtype=np.int64),
+                             np.arange(cell_top, cell_bottom + 1, dtype=np.int64))
+        cells = np.sort(self._cell_keys(cx.ravel(), cy.ravel()))
+        starts = np.searchsorted(self.sorted_keys, cells, 'left')
+        ends = np.searchsorted(self.sorted_keys, cells, 'right')
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if not total:
+            return np.empty(0, dtype=np.intp)
+        # 把各个格子的区间[start, end)拼成一个下标数组
+        candidates = self.order[np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)]
+        xs, ys = self.xs[candidates], self.ys[candidates]
+        return candidates[(xs >= left) & (xs < right) & (ys >= top) & (ys < bottom)]
\ No newline at end of file
@@ -0,0 +1,87 @@
+import json
+
+import pygame
+from config import *
+from memtrack import track_surface
+
+
+class SpriteAtlas:
+    """
+    按atlas.json中的布局切分精灵图
+    每一帧都复制成独立的display格式Surface，缩放后的版本第一次用到时生成并缓存
+    """
+
+    def __init__(self, path=ATLAS_FILE):
+        with open(path, encoding='utf-8') as f:
+            self.layouts = json.load(f)
+        self._sheets = {}
+        self._frames = {}
+
+    def frame_size(self, name, scale=1):
+        width, height = self.layouts[name]['frame_size']
+        return width * scale, height * scale
+
+    def _sheet(self, name):
+        sheet = self._sheets.get(name)
+        if sheet is None:
+            sheet = pygame.image.load(self.layouts[name]['image']).convert_alpha()
+            self._sheets[name] = track_surface(sheet, 'sprites', f'{name}_sheet')
+        return sheet
+
+    def frames(self, name, scale=1):
+        """返回 {方向: [帧Surface]}，scale不为1时返回缩放后的帧"""
+        key = (name, scale)
+        frames = self._frames.get(key)
+        if frames is not None:
+            return frames
+
+        if scale == 1:
+            layout = self.layouts[name]
+            width, height = layout['frame_size']
+            sheet = self._sheet(name)
+            frames = {
+                direction: [sheet.subsurface((col * width, row * height, width, height)).copy()
+                            for col in range(layout['frames'])]
+                for direction, row in layout['rows'].items()
+            }
+        else:
+            size = self.frame_size(name, scale)
+            frames = {
+                direction: [pygame.transform.scale(frame, size) for frame in base]
+                for direction, base in self.frames(name).items()
+            }
+        owner = name if scale == 1 else f'{name}x{scale}'
+        for surfaces in frames.values():
+            for frame in surfaces:
+                track_surface(frame, 'sprites', owner)
+        self._frames[key] = frames
+        return frames
+
+
+class Animation:
+    """按经过的时间切换帧的动画，与帧率无关"""
+
+    def __init__(self, frames, frame_time=ANIMATION_FRAME_MS, loop=True):
+        self.frames = frames
+        self.frame_time = frame_time
+        self.loop = loop
+        self.elapsed = 0
+        self.index = 0
+        self.image = frames[0]
+
+    def reset(self):
+        self.elapsed = 0
+        self.index = 0
+        self.image = self.frames[0]
+
+    def update(self, dt):
+        """推进dt毫秒"""
+        self.elapsed += dt
+        if self.elapsed < self.frame_time:
+            return
+        steps, self.elapsed = divmod(self.elapsed, self.frame_time)
+        if self.loop:
+            self.index = (self.index + int(steps)) % len(self.frames)
+        else:
+            self.index = min(self.index + int(steps), len(self.frames) - 1)
+        self.image = self.frames[self.index]
\ No newline at end of file
@@ -0,0 +1,166 @@
+import random
+
+import numpy as np
+
+# 方向编号与SlimeNPC的方向字符串对应
+DIRECTIONS = ['down', 'left', 'right', 'up']
+DIRECTION_DX = np.array([0, -1, 1, 0], dtype=np.float32)
+DIRECTION_DY = np.array([1, 0, 0, -1], dtype=np.float32)
+
+MOVING = 0
+WAITING = 1
+STATE_NAMES = ['moving', 'waiting']
+
+# 每只史莱姆的状态字段及其数组类型
+FIELDS = [
+    ('x', np.float32),
+    ('y', np.float32),
+    ('speed', np.float32),
+    ('direction', np.int8),
+    ('state', np.int8),
+    ('move_counter', np.int16),
+    ('animation_counter', np.int16),
+    ('frame_index', np.int8),
+]
+
+
+class SlimeView:
+    """单个史莱姆的只读视图，兼容原来按SlimeNPC属性访问的代码"""
+
+    __slots__ = ('swarm', 'index')
+
+    def __init__(self, swarm, index):
+        self.swarm = swarm
+        self.index = index
+
+    @property
+    def x(self):
+        return float(self.swarm.x[self.index])
+
+    @property
+    def y(self):
+        return float(self.swarm.y[self.index])
+
+    @property
+    def direction(self):
+        return DIRECTIONS[self.swarm.direction[self.index]]
+
+    @property
+    def frame_index(self):
+        return int(self.swarm.frame_index[self.index])
+
+    @property
+    def state(self):
+        return STATE_NAMES[self.swarm.state[self.index]]
+
+
+class SlimeSwarm:
+    """
+    用NumPy数组保存所有史莱姆的状态，一次批量更新全部史莱姆
+    行为与SlimeNPC.update相同：移动move_duration个tick，停下wait_duration个tick后换方向
+    """
+
+    def __init__(self, capacity=16, speed=1.5, move_duration=60, wait_duration=30, seed=None):
+        self.count = 0
+        self.default_speed = speed
+        self.move_duration = move_duration
+        self.wait_duration = wait_duration
+        # 默认从random模块取种子，random.seed()同样能复现史莱姆的行为
+        self.rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+        self._allocate(capacity)
+
+    @classmethod
+    def from_positions(cls, positions, **kwargs):
+        swarm = cls(capacity=max(16, len(positions)), **kwargs)
+        for x, y in positions:
+            swarm.spawn(x, y)
+        return swarm
+
+    def _allocate(self, capacity):
+        """按capacity分配（或扩容）状态数组"""
+        for name, dtype in FIELDS:
+            array = np.zeros(capacity, dtype=dtype)
+            old = getattr(self, name, None)
+            if old is not None:
+                array[:self.count] = old[:self.count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    def spawn(self, x, y, speed=None):
+        """添加一只史莱姆，返回它的视图"""
+        if self.count == self.capacity:
+            self._allocate(self.capacity * 2)
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.speed[i] = self.default_speed if speed is None else speed
+        self.direction[i] = 0
+        self.state[i] = MOVING
+        self.move_counter[i] = 0
+        self.animation_counter[i] = 0
+        self.frame_index[i] = 0
+        self.count += 1
+        return SlimeView(self, i)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return SlimeView(self, index)
+
+    def __iter__(self):
+        return (SlimeView(self, i) for i in range(self.count))
+
+    def update(self, grid=None, flow=None):
+        """
+        批量更新所有史莱姆的状态和位置
+        :param grid: navigation.WalkGrid，给出时史莱姆不会走进障碍
+        :param flow: navigation.FlowField，给出时搜索范围内移动中的史莱姆沿流场走向目标
+        """
+        n = self.count
+        if n == 0:
+            return
+        state = self.state[:n]
+        counter = self.move_counter[:n]
+        direction = self.direction[:n]
+
+        counter += 1
+        moving = state == MOVING
+        end_move = moving & (counter >= self.move_duration)
+        end_wait = ~moving & (counter >= self.wait_duration)
+        switched = end_move | end_wait
+        if switched.any():
+            state[end_move] = WAITING
+            state[end_wait] = MOVING
+            counter[switched] = 0
+            # 停下来的史莱姆一次性抽取新方向
+            direction[end_move] = self.rng.integers(0, 4, size=int(end_move.sum()), dtype=np.int8)
+            moving = state == MOVING
+
+        if flow is not None:
+            flow_direction, _ = flow.lookup(self.x[:n], self.y[:n])
+            chasing = moving & (flow_direction >= 0)
+            direction[chasing] = flow_direction[chasing]
+
+        step = self.speed[:n] * moving
+        if grid is None:
+            self.x[:n] += DIRECTION_DX[direction] * step
+            self.y[:n] += DIRECTION_DY[direction] * step
+        else:
+            x, y = self.x[:n], self.y[:n]
+            new_x = x + DIRECTION_DX[direction] * step
+            new_y = y + DIRECTION_DY[direction] * step
+            # 要走进障碍的史莱姆停在原地（已经在障碍里的允许走出来）
+            allowed = grid.walkable(new_x, new_y) | ~grid.walkable(x, y)
+            x[allowed] = new_x[allowed]
+            y[allowed] = new_y[allowed]
+
+        animation_counter = self.animation_counter[:n]
+        animation_counter += 1
+        wrapped = animation_counter >= 10
+        if wrapped.any():
+            animation_counter[wrapped] = 0
+            frame_index = self.frame_index[:n]
+            frame_index[wrapped] = (frame_index[wrapped] + 1) % 4
\ No newline at end of file
@@ -1,12 +1,64 @@
 import pygame
+from collections import OrderedDict
 from config import *
+from widgets import Label, Panel, TextBox
+from fonts import LazyFont
+from memtrack import track_surface
 
-# 初始化字体（如果config.py中未定义）
+# 字体（如果config.py中未定义），第一次画文字时才查找字体文件并创建
 if 'font_small' not in globals():
-    pygame.font.init()
-    font_small = pygame.font.SysFont("simhei", 20)
-    font_medium = pygame.font.SysFont("simhei", 24)
-    font_large = pygame.font.SysFont("simhei", 32)
+    font_small = LazyFont(UI_FONT, 20)
+    font_medium = LazyFont(UI_FONT, 24)
+    font_large = LazyFont(UI_FONT, 32)
+
+
+class TextCache:
+    """文字渲染缓存，键为(font, text, color, antialias)，超出容量时淘汰最久未使用的"""
+
+    def __init__(self, capacity=TEXT_CACHE_SIZE):
+        self.capacity = capacity
+        self.hits = 0
+        self.misses = 0
+        self._surfaces = OrderedDict()
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, color, antialias)
+        surface = self._surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self._surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = track_surface(font.render(text, antialias, color), 'text', 'text_cache')
+        self._surfaces[key] = surface
+        if len(self._surfaces) > self.capacity:
+            self._surfaces.popitem(last=False)
+        return surface
+
+    def clear(self):
+        self._surfaces.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, antialias, color):
+    """代替font.render()，相同的文字只渲染一次"""
+    return text_cache.render(font, text, antialias, color)
+
+
+# 常驻的界面面板，第一次绘制时创建，之后每帧复用
+_panels = {}
+
+
+def _get_panel(name, builder):
+    panel = _panels.get(name)
+    if panel is None:
+        panel = _panels[name] = builder()
+    return panel
 
 
 def draw_health_bar(surface, x, y, width, height, current, max_val, color):
@@ -37,57 +89,59 @@ def draw_battle_screen(screen, player, monster, battle_bg, attack_btn, defend_bt
     # 绘制怪物和玩家角色
     screen.blit(slime_animations['down'][slime_frame % 4], (monster_x, monster_y))
 
-    char_x = SCREEN_WIDTH - 100 - player_animations[current_direction][current_frame].get_width()
-    char_y = SCREEN_HEIGHT - 100 - player_animations[current_direction][current_frame].get_height()
-    screen.blit(player_animations[current_direction][current_frame], (char_x, char_y))
+    player_image = player_animations[current_direction][current_frame]
+    screen.blit(player_image, player_image.get_rect(bottomright=(SCREEN_WIDTH - 100, SCREEN_HEIGHT - 100)))
 
     # ---- 绘制血条和信息 ----
     # 玩家血条
     draw_health_bar(screen, 50, 50, 200, 20, player.hp, player.max_hp, GREEN)
-    player_text = font_medium.render(f"玩家 Lv.{player.level} (HP: {player.hp}/{player.max_hp})", True, WHITE)
+    player_text = render_text(font_medium, f"玩家 Lv.{player.level} (HP: {player.hp}/{player.max_hp})", True, WHITE)
     screen.blit(player_text, (50, 30))
 
     # 怪物血条
     draw_health_bar(screen, SCREEN_WIDTH - 250, 50, 200, 20, monster.hp, monster.max_hp, RED)
-    monster_text = font_medium.render(f"{monster.name} (HP: {monster.hp}/{monster.max_hp})", True, WHITE)
+    monster_text = render_text(font_medium, f"{monster.name} (HP: {monster.hp}/{monster.max_hp})", True, WHITE)
     screen.blit(monster_text, (SCREEN_WIDTH - 250, 30))
 
     # ---- 绘制战斗按钮 ----
     # 攻击按钮
     screen.blit(attack_btn, (50, SCREEN_HEIGHT - 150))
-    attack_text = font_medium.render("攻击", True, WHITE)
+    attack_text = render_text(font_medium, "攻击", True, WHITE)
     screen.blit(attack_text, (125 - attack_text.get_width() // 2, SCREEN_HEIGHT - 135))
 
     # 防御按钮
     screen.blit(defend_btn, (SCREEN_WIDTH // 2 - 75, SCREEN_HEIGHT - 150))
-    defend_text = font_medium.render("防御", True, WHITE)
+    defend_text = render_text(font_medium, "防御", True, WHITE)
     screen.blit(defend_text, (SCREEN_WIDTH // 2 - defend_text.get_width() // 2, SCREEN_HEIGHT - 135))
 
     # 逃跑按钮
     screen.blit(flee_btn, (SCREEN_WIDTH - 200, SCREEN_HEIGHT - 150))
-    flee_text = font_medium.render("逃跑", True, WHITE)
+    flee_text = render_text(font_medium, "逃跑", True, WHITE)
     screen.blit(flee_text, (SCREEN_WIDTH - 125 - flee_text.get_width() // 2, SCREEN_HEIGHT - 135))
 
     # ---- 绘制战斗消息 ----
     if message:
-        message_lines = message.split('\n')
-        message_height = len(message_lines) * 30 + 20
-
-        # 半透明消息背景
-        message_bg = pygame.Surface((SCREEN_WIDTH - 100, message_height), pygame.SRCALPHA)
-        message_bg.fill((0, 0, 0, 200))
-        screen.blit(message_bg, (50, SCREEN_HEIGHT - message_height - 40))
-
-        # 逐行绘制消息
-        for i, line in enumerate(message_lines):
-            message_text = font_medium.render(line, True, WHITE)
-            screen.blit(message_text, (70, SCREEN_HEIGHT - message_height - 20 + i * 30))
+        # 半透明消息框（只在消息变化时重建）
+        message_box = _get_panel('battle_message', lambda: TextBox(
+            font_medium, WHITE, SCREEN_WIDTH - 100, (0, 0, 0, 200), name='battle_message',
+            render=render_text))
+        message_box.update(message)
+        screen.blit(message_box.surface, (50, SCREEN_HEIGHT - message_box.get_height() - 40))
 
         # 提示继续文字
-        hint_text = font_small.render("按空格继续...", True, (200, 200, 200))
+        hint_text = render_text(font_small, "按空格继续...", True, (200, 200, 200))
         screen.blit(hint_text, (SCREEN_WIDTH - 150, SCREEN_HEIGHT - 50))
 
 
+def _build_dialog_panel():
+    return Panel((50, SCREEN_HEIGHT - 140, SCREEN_WIDTH - 100, 120), (0, 0, 0, 200), [
+        # 对话文本
+        Label(font_medium, "{}", WHITE, (20, 20), lambda lines, index: (lines[index],)),
+        # 继续提示
+        Label(font_medium, "按空格继续...", (200, 200, 200), (SCREEN_WIDTH - 250, 60)),
+    ], name='dialog', render=render_text)
+
+
 def draw_dialog(screen, dialog_lines, current_dialog, camera_x, camera_y, npc_image, npc_pos):
     """
     绘制对话框界面
@@ -97,85 +151,82 @@ def draw_dialog(screen, dialog_lines, current_dialog, camera_x, camera_y, npc_im
     # 绘制NPC
     screen.blit(npc_image, (npc_pos[0] + camera_x, npc_pos[1] + camera_y))
 
-    # 对话框背景
-    dialog_bg = pygame.Surface((SCREEN_WIDTH - 100, 120), pygame.SRCALPHA)
-    dialog_bg.fill((0, 0, 0, 200))
-    screen.blit(dialog_bg, (50, SCREEN_HEIGHT - 140))
-
-    # 对话文本
-    text = font_medium.render(dialog_lines[current_dialog], True, WHITE)
-    screen.blit(text, (70, SCREEN_HEIGHT - 120))
-
-    # 继续提示
-    hint = font_medium.render("按空格继续...", True, (200, 200, 200))
-    screen.blit(hint, (SCREEN_WIDTH - 200, SCREEN_HEIGHT - 80))
+    # 对话框
+    _get_panel('dialog', _build_dialog_panel).draw(screen, dialog_lines, current_dialog)
+
+
+def _build_level_up_panel():
+    center_x = SCREEN_WIDTH // 2
+    return Panel((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 180), [
+        # 标题
+        Label(font_large, "升级!", YELLOW, (center_x, 100), anchor='midtop'),
+        # 属性变化列表
+        Label(font_medium, "等级: {} → {}", WHITE, (center_x, 200),
+              lambda p: (p.level - 1, p.level), anchor='midtop'),
+        Label(font_medium, "最大HP: {} → {}", WHITE, (center_x, 240),
+              lambda p: (p.max_hp - 20, p.max_hp), anchor='midtop'),
+        Label(font_medium, "攻击力: {} → {}", WHITE, (center_x, 280),
+              lambda p: (p.attack - 5, p.attack), anchor='midtop'),
+        Label(font_medium, "防御力: {} → {}", WHITE, (center_x, 320),
+              lambda p: (p.defense - 3, p.defense), anchor='midtop'),
+        # 继续提示
+        Label(font_medium, "按空格继续...", (200, 200, 200), (center_x, SCREEN_HEIGHT - 100), anchor='midtop'),
+    ], name='level_up', render=render_text)
 
 
 def draw_level_up_screen(screen, player):
     """绘制升级界面"""
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 180))
-    screen.blit(overlay, (0, 0))
-
-    # 标题
-    title = font_large.render("升级!", True, YELLOW)
-    screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 100))
+    _get_panel('level_up', _build_level_up_panel).draw(screen, player)
 
-    # 属性变化列表
-    stats = [
-        f"等级: {player.level - 1} → {player.level}",
-        f"最大HP: {player.max_hp - 20} → {player.max_hp}",
-        f"攻击力: {player.attack - 5} → {player.attack}",
-        f"防御力: {player.defense - 3} → {player.defense}"
-    ]
 
-    # 绘制每条属性变化
-    for i, stat in enumerate(stats):
-        stat_text = font_medium.render(stat, True, WHITE)
-        screen.blit(stat_text, (SCREEN_WIDTH // 2 - stat_text.get_width() // 2, 200 + i * 40))
-
-    # 继续提示
-    continue_text = font_medium.render("按空格继续...", True, (200, 200, 200))
-    screen.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2, SCREEN_HEIGHT - 100))
+def _build_game_over_panel():
+    center_x = SCREEN_WIDTH // 2
+    return Panel((0, 0, SCREEN_WIDTH, SCREEN_HEIGHT), (0, 0, 0, 220), [
+        # 标题
+        Label(font_large, "游戏结束", RED, (center_x, 200), anchor='midtop'),
+        # 选项
+        Label(font_medium, "按R键重新开始游戏", WHITE, (center_x, 300), anchor='midtop'),
+        Label(font_medium, "按ESC键退出游戏", WHITE, (center_x, 350), anchor='midtop'),
+    ], name='game_over', render=render_text)
 
 
 def draw_game_over_screen(screen):
     """绘制游戏结束界面"""
-    overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-    overlay.fill((0, 0, 0, 220))
-    screen.blit(overlay, (0, 0))
+    _get_panel('game_over', _build_game_over_panel).draw(screen)
+
 
-    # 标题
-    title = font_large.render("游戏结束", True, RED)
-    screen.blit(title, (SCREEN_WIDTH // 2 - title.get_width() // 2, 200))
+# HUD占用的屏幕区域（地图需要在这里重画）
+HUD_RECT = pygame.Rect(10, 10, 200, 110)
 
-    # 选项
-    options = [
-        "按R键重新开始游戏",
-        "按ESC键退出游戏"
-    ]
-    for i, option in enumerate(options):
-        option_text = font_medium.render(option, True, WHITE)
-        screen.blit(option_text, (SCREEN_WIDTH // 2 - option_text.get_width() // 2, 300 + i * 50))
+
+def _build_hud_panel():
+    return Panel(HUD_RECT, (0, 0, 0, 150), [
+        Label(font_small, "等级: {}", WHITE, (10, 5), lambda p, map_name: (p.level,)),
+        Label(font_small, "HP: {}/{}", WHITE, (10, 25), lambda p, map_name: (p.hp, p.max_hp)),
+        Label(font_small, "经验: {}/{}", WHITE, (10, 45), lambda p, map_name: (p.exp, p.exp_to_level)),
+        Label(font_small, "金币: {}", YELLOW, (10, 65), lambda p, map_name: (p.gold,)),
+        Label(font_small, "区域: {}", (200, 200, 255), (10, 85), lambda p, map_name: (map_name,)),
+    ], name='hud', render=render_text)
 
 
 def draw_hud(screen, player, map_name):
-    """绘制游戏主界面的HUD（状态栏）"""
-    # 半透明背景
-    status_bg = pygame.Surface((200, 100), pygame.SRCALPHA)
-    status_bg.fill((0, 0, 0, 150))
-    screen.blit(status_bg, (10, 10))
-
-    # 玩家状态信息
-    level_text = font_small.render(f"等级: {player.level}", True, WHITE)
-    hp_text = font_small.render(f"HP: {player.hp}/{player.max_hp}", True, WHITE)
-    exp_text = font_small.render(f"经验: {player.exp}/{player.exp_to_level}", True, WHITE)
-    gold_text = font_small.render(f"金币: {player.gold}", True, YELLOW)
-    map_text = font_small.render(f"区域: {map_name}", True, (200, 200, 255))
-
-    # 绘制文本
-    screen.blit(level_text, (20, 15))
-    screen.blit(hp_text, (20, 35))
-    screen.blit(exp_text, (20, 55))
-    screen.blit(gold_text, (20, 75))
-    screen.blit(map_text, (20, 95))
\ No newline at end of file
+    """绘制游戏主界面的HUD（状态栏），只有玩家数据变化的那一行会重新渲染"""
+    _get_panel('hud', _build_hud_panel).draw(screen, player, map_name)
+
+
+def draw_profiler_overlay(screen, stats, extra_lines=()):
+    """
+    绘制性能分析面板
+    :param stats: FrameProfiler.percentiles()的结果
+    :param extra_lines: 附加在表格下方的文字行
+    :return: 面板占用的屏幕区域
+    """
+    lines = ["阶段 (ms)          p50    p95    p99"]
+    for name, (p50, p95, p99) in stats.items():
+        lines.append(f"{name:<16}{p50:7.2f}{p95:7.2f}{p99:7.2f}")
+    lines.extend(extra_lines)
+    box = _get_panel('profiler', lambda: TextBox(
+        font_small, WHITE, 330, (0, 0, 0, 180), line_height=20, padding=10, name='profiler',
+        render=render_text))
+    box.update('\n'.join(lines))
+    return screen.blit(box.surface, (SCREEN_WIDTH - box.surface.get_width() - 10, 10))
\ No newline at end of file
@@ -0,0 +1,121 @@
+import pygame
+from config import *
+from memtrack import track_surface
+
+
+def render_direct(font, text, antialias, color):
+    """不经过文字缓存直接渲染；界面代码应传入ui.render_text"""
+    return track_surface(font.render(text, antialias, color), 'text', 'widgets')
+
+
+class Label:
+    """
+    绑定到数据的文字控件，只有绑定的值变化时才重新渲染
+    :param bind: 从数据源取值的函数，返回的元组依次填入fmt
+    :param anchor: pos对应文字矩形的哪个位置，例如'topleft'、'midtop'
+    :param render: 签名与font.render相同的渲染函数（加入Panel时使用Panel的）
+    """
+
+    def __init__(self, font, fmt, color, pos, bind=None, anchor='topleft', render=render_direct):
+        self.render = render
+        self.font = font
+        self.fmt = fmt
+        self.color = color
+        self.pos = pos
+        self.bind = bind
+        self.anchor = anchor
+        self.values = None
+        self.surface = None
+        self.rect = None
+
+    def update(self, *sources):
+        """重新取值，值有变化时返回True"""
+        values = self.bind(*sources) if self.bind else ()
+        if self.surface is not None and values == self.values:
+            return False
+        self.values = values
+        self.surface = self.render(self.font, self.fmt.format(*values), True, self.color)
+        self.rect = self.surface.get_rect(**{self.anchor: self.pos})
+        return True
+
+
+class Panel:
+    """
+    持有一块持久的半透明底板，控件的值变化时只在底板上重画对应的区域
+    :param name: 内存统计中底板的所属
+    :param render: 所有控件使用的文字渲染函数，例如ui.render_text
+    """
+
+    def __init__(self, rect, bg_color, labels, name='panel', render=render_direct):
+        self.rect = pygame.Rect(rect)
+        self.bg_color = bg_color
+        self.labels = labels
+        for label in labels:
+            label.render = render
+        self.name = name
+        self.surface = track_surface(pygame.Surface(self.rect.size, pygame.SRCALPHA), 'ui', name)
+        self.surface.fill(bg_color)
+        self._drawn = {}
+
+    def update(self, *sources):
+        changed = [label for label in self.labels if label.update(*sources)]
+        if not changed:
+            return False
+
+        # 受影响的区域：变化控件的旧区域和新区域；与之相交的控件要整块擦掉重画
+        # （半透明文字叠画会变粗），它们的区域又可能碰到别的控件，直到不再扩大
+        damaged = [self._drawn[label] for label in changed if label in self._drawn]
+        damaged += [label.rect for label in changed]
+        redraw = set(changed)
+        grown = True
+        while grown:
+            grown = False
+            for label in self.labels:
+                drawn = self._drawn.get(label)
+                if label not in redraw and drawn is not None and drawn.collidelist(damaged) != -1:
+                    redraw.add(label)
+                    damaged.append(drawn)
+                    grown = True
+        for rect in damaged:
+            self.surface.fill(self.bg_color, rect)
+        for label in self.labels:
+            if label in redraw:
+                self._drawn[label] = self.surface.blit(label.surface, label.rect)
+        return True
+
+    def draw(self, screen, *sources):
+        self.update(*sources)
+        screen.blit(self.surface, self.rect.topleft)
+
+
+class TextBox:
+    """多行文字消息框，只在消息内容变化时重建底板"""
+
+    def __init__(self, font, color, width, bg_color, line_height=30, padding=20, name='text_box',
+                 render=render_direct):
+        self.name = name
+        self.render = render
+        self.font = font
+        self.color = color
+        self.width = width
+        self.bg_color = bg_color
+        self.line_height = line_height
+        self.padding = padding
+        self.message = None
+        self.surface = None
+
+    def update(self, message):
+        if message == self.message:
+            return False
+        self.message = message
+        lines = message.split('\n')
+        height = len(lines) * self.line_height + self.padding
+        self.surface = track_surface(pygame.Surface((self.width, height), pygame.SRCALPHA), 'ui', self.name)
+        self.surface.fill(self.bg_color)
+        for i, line in enumerate(lines):
+            text = self.render(self.font, line, True, self.color)
+            self.surface.blit(text, (self.padding, self.padding + i * self.line_height))
+        return True
+
+    def get_height(self):
+        return self.surface.get_height()
\ No newline at end of file